@@ -1,10 +1,35 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 
+from almacen_precios import AlmacenPrecios
+from analitica_cartera import AnaliticaCartera, calcular_rendimientos
+from backtest import comparar_politicas
+from cache_compartido import CacheSQLite, clave_cache
+from cuestionario import (
+    IDS_SECCIONES,
+    OPCIONES,
+    PREGUNTAS,
+    PREGUNTAS_SECCIONES,
+    SIN_RESPUESTA,
+    clasificar_puntaje,
+    hoja_respuestas,
+)
+from graficas import reducir_serie, reducir_tabla
+from instrumentacion import configurar_log_metricas, contar_llamadas, fin_etapa, marcar_fallo, medir_pagina
+from interes_compuesto import malla_valores_finales, proyectar_patrimonio
+from montecarlo import simular_cartera
+from optimizador import frontera_eficiente, redondear_pesos
+from precarga import Precargador
+from riesgo import TICKER_MERCADO, metricas_riesgo, volatilidad_movil
+from sesiones import AlmacenSesiones, decodificar, huellas, instantanea, nuevo_token
+from universo_etfs import cargar_universo
+
 # Configuración inicial de Streamlit
 st.set_page_config(page_title="Simulador de Inversiones - Allianz Patrimonial", layout="wide")
 
@@ -12,36 +37,222 @@ st.set_page_config(page_title="Simulador de Inversiones - Allianz Patrimonial",
 def navigate_to(page):
     st.session_state["current_page"] = page
 
+# Almacén de sesiones (uno por proceso); al crearlo se purgan las sesiones inactivas
+@st.cache_resource
+def obtener_sesiones():
+    sesiones = AlmacenSesiones()
+    sesiones.purgar()
+    return sesiones
+
+# Clave del radio de cada pregunta: identificador 0 a 66 con prefijo "q", distinta de las
+# columnas p1..p67 de los archivos de respuestas (numeradas desde 1)
+def clave_radio(id_pregunta):
+    return f"q{id_pregunta}"
+
+# Función para restaurar la sesión guardada con el token de la URL (una vez por conexión)
+def restaurar_sesion():
+    token = st.query_params.get("sesion")
+    if not token:
+        token = nuevo_token()
+        st.query_params["sesion"] = token
+    guardada = obtener_sesiones().cargar(token)
+    for clave, (tipo, datos) in guardada.items():
+        st.session_state[clave] = decodificar(tipo, datos)
+    # Los radios del cuestionario muestran las respuestas restauradas
+    if "respuestas" in st.session_state:
+        respuestas = st.session_state["respuestas"]
+        for id_pregunta in np.flatnonzero(respuestas != SIN_RESPUESTA):
+            st.session_state[clave_radio(id_pregunta)] = int(respuestas[id_pregunta])
+    st.session_state["sesion_token"] = token
+    st.session_state["sesion_guardada"] = huellas(guardada)
+
+# Función para guardar los valores de la sesión que cambiaron en esta ejecución
+def guardar_sesion():
+    actual = instantanea(st.session_state)
+    obtener_sesiones().guardar(st.session_state["sesion_token"], actual, st.session_state["sesion_guardada"])
+    st.session_state["sesion_guardada"] = huellas(actual)
+
+if "sesion_token" not in st.session_state:
+    restaurar_sesion()
+
 # Inicializar la página actual
 if "current_page" not in st.session_state:
     st.session_state["current_page"] = "registro"
 
-# Función para descargar datos
-@st.cache_data
-def download_data(ticker, start, end):
+# Almacén de precios compartido por todas las sesiones del proceso
+@st.cache_resource
+def obtener_almacen():
+    return AlmacenPrecios()
+
+# Caché compartida entre réplicas (SQLite) para precios y resultados derivados
+@st.cache_resource
+def obtener_cache():
+    return CacheSQLite()
+
+# Tiempo de vida en la caché compartida: corto si la ventana incluye el día de hoy
+def ttl_ventana(end):
+    return 3600 if end >= datetime.now().date() else 7 * 24 * 3600
+
+# Precargador de precios en segundo plano (uno por proceso)
+@st.cache_resource
+def obtener_precargador():
+    return Precargador(obtener_almacen())
+
+# Días de historia de la ventana predeterminada: 10 años de calendario más una semana,
+# para que exista un cierre en o antes del inicio del periodo "10A" de la tabla de rendimientos
+DIAS_VENTANA = round(365.25 * 10) + 7
+
+# Ventana de fechas predeterminada de las recomendaciones (últimos 10 años)
+def ventana_predeterminada():
+    return (datetime.now() - timedelta(days=DIAS_VENTANA)).date(), datetime.now().date()
+
+# Al iniciar la sesión se empiezan a descargar los ETFs de todas las carteras sugeridas
+if "precarga_iniciada" not in st.session_state:
+    obtener_precargador().iniciar(cargar_universo().tickers_sugeridos() + [TICKER_MERCADO], *ventana_predeterminada())
+    st.session_state["precarga_iniciada"] = True
+
+# Función para saber si una descarga trae datos de todos los tickers
+def precios_completos(precios):
+    return not precios.isna().all().any()
+
+# Función para descargar datos (precios de cierre de varios tickers en una sola llamada)
+@contar_llamadas("download_data")
+@st.cache_data(max_entries=32, ttl=3600)
+def download_data(tickers, start, end):
+    marcar_fallo("download_data")
     try:
-        data = yf.download(ticker, start=start, end=end)
-        if data.empty:
+        clave = clave_cache("precios", tickers, start, end)
+        data = obtener_cache().obtener(clave)
+        if data is None:
+            data = obtener_almacen().precios(list(tickers), start, end)
+            # Las descargas incompletas no se comparten con las demás réplicas
+            if precios_completos(data):
+                obtener_cache().guardar(clave, data, ttl=ttl_ventana(end))
+        for ticker in data.columns[data.isna().all()]:
             st.warning(f"No se encontraron datos para el ticker {ticker}.")
         return data
     except Exception as e:
-        st.error(f"Error al descargar datos de {ticker}: {e}")
+        st.error(f"Error al descargar datos de {', '.join(tickers)}: {e}")
         st.stop()
         return pd.DataFrame()
 
-# Función para calcular rendimientos históricos
-def calcular_rendimientos(precios, periodos):
-    rendimientos = {}
-    for ticker in precios.columns:
-        rendimientos[ticker] = {}
-        for periodo, dias in periodos.items():
-            if len(precios[ticker].dropna()) > dias:
-                rendimientos[ticker][periodo] = round(
-                    (precios[ticker][-1] / precios[ticker][-dias] - 1) * 100, 2
-                )
-            else:
-                rendimientos[ticker][periodo] = None
-    return pd.DataFrame(rendimientos).T
+# Procesos para Monte Carlo: un solo grupo por servidor, de tamaño acotado y creado con
+# "spawn" (hacer fork del servidor de Streamlit, que tiene varios hilos, puede bloquearse).
+# SIMULADOR_PROCESOS_MONTECARLO=1 lo desactiva.
+@st.cache_resource
+def obtener_pool_montecarlo():
+    procesos = int(os.environ.get("SIMULADOR_PROCESOS_MONTECARLO", min(4, os.cpu_count() or 1)))
+    if procesos <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn"))
+
+# Función para simular la cartera con Monte Carlo (cacheada por parámetros)
+@contar_llamadas("simulacion_montecarlo")
+@st.cache_data(max_entries=20)
+def simulacion_montecarlo(rendimiento_anual, matriz_covarianza, pesos, anios, n_trayectorias, valor_inicial):
+    marcar_fallo("simulacion_montecarlo")
+    return simular_cartera(
+        rendimiento_anual,
+        matriz_covarianza,
+        pesos,
+        anios=anios,
+        n_trayectorias=n_trayectorias,
+        valor_inicial=valor_inicial,
+        semilla=0,
+        pool=obtener_pool_montecarlo()
+    )
+
+# Función para dibujar la gráfica de abanico con los percentiles simulados
+def grafica_abanico(percentiles):
+    fig, ax = plt.subplots(figsize=(10, 4))
+    anios = percentiles.index / 12
+    ax.fill_between(anios, percentiles["P5"], percentiles["P95"], alpha=0.2, color="#1f77b4", label="P5 - P95")
+    ax.fill_between(anios, percentiles["P25"], percentiles["P75"], alpha=0.4, color="#1f77b4", label="P25 - P75")
+    ax.plot(anios, percentiles["P50"], color="#1f77b4", label="Mediana")
+    ax.set_xlabel("Años")
+    ax.set_ylabel("Valor de la cartera ($)")
+    ax.legend(loc="upper left")
+    return fig
+
+# Función para obtener las estadísticas de precios de una ventana de fechas.
+# Se guarda como recurso (sin copiar en cada ejecución) porque solo cambia con los
+# tickers o las fechas; mover los sliders de pesos la reutiliza.
+@contar_llamadas("analitica_cacheada")
+@st.cache_resource(max_entries=20)
+def analitica_cacheada(tickers, start, end):
+    marcar_fallo("analitica_cacheada")
+    return obtener_cache().obtener_o_calcular(
+        clave_cache("analitica", tickers, start, end),
+        lambda: AnaliticaCartera(download_data(tickers, start, end)),
+        ttl=ttl_ventana(end),
+        compartir=lambda analitica: precios_completos(analitica.precios_completos)
+    )
+
+# Función para calcular la tabla de rendimientos de varios ETFs del universo (descarga en lote)
+@st.cache_data(max_entries=20)
+def rendimientos_universo(tickers, end):
+    start = end - timedelta(days=DIAS_VENTANA)
+    return obtener_cache().obtener_o_calcular(
+        clave_cache("rendimientos", tickers, start, end),
+        lambda: calcular_rendimientos(download_data(tickers, start, end)),
+        ttl=ttl_ventana(end),
+        compartir=lambda _: precios_completos(download_data(tickers, start, end))
+    )
+
+# Función para obtener los rendimientos diarios del mercado (SPY), usados para la beta
+def rendimientos_mercado(start, end):
+    return download_data((TICKER_MERCADO,), start, end)[TICKER_MERCADO].pct_change()
+
+# Función para calcular las métricas de riesgo de cada ETF (cacheada por conjunto de ETFs y ventana de fechas)
+@contar_llamadas("riesgo_cacheado")
+@st.cache_data(max_entries=20)
+def riesgo_cacheado(tickers, start, end):
+    marcar_fallo("riesgo_cacheado")
+
+    def calcular():
+        analitica = analitica_cacheada(tickers, start, end)
+        return metricas_riesgo(analitica.daily_returns, rendimientos_mercado(start, end))
+    return obtener_cache().obtener_o_calcular(
+        clave_cache("riesgo", tickers, start, end),
+        calcular,
+        ttl=ttl_ventana(end),
+        compartir=lambda _: (
+            precios_completos(download_data(tickers, start, end))
+            and precios_completos(download_data((TICKER_MERCADO,), start, end))
+        )
+    )
+
+# Función para calcular la frontera eficiente (cacheada por conjunto de ETFs y ventana de fechas)
+@contar_llamadas("frontera_cacheada")
+@st.cache_data(max_entries=20)
+def frontera_cacheada(tickers, start, end):
+    marcar_fallo("frontera_cacheada")
+
+    def calcular():
+        analitica = analitica_cacheada(tickers, start, end)
+        return frontera_eficiente(analitica.rendimiento_anual, analitica.matriz_covarianza)
+    return obtener_cache().obtener_o_calcular(
+        clave_cache("frontera", tickers, start, end),
+        calcular,
+        ttl=ttl_ventana(end),
+        compartir=lambda _: precios_completos(download_data(tickers, start, end))
+    )
+
+# Función para dibujar la frontera eficiente junto con la cartera actual
+def grafica_frontera(optimo, rendimiento_actual, volatilidad_actual):
+    frontera = optimo["frontera"]
+    fig, ax = plt.subplots(figsize=(8, 4))
+    ax.plot(frontera["Volatilidad"] * 100, frontera["Rendimiento"] * 100, label="Frontera eficiente")
+    for nombre, cartera, marcador in (
+        ("Máximo Sharpe", optimo["max_sharpe"], "*"),
+        ("Mínima varianza", optimo["min_varianza"], "s"),
+    ):
+        ax.scatter(cartera["Volatilidad"] * 100, cartera["Rendimiento"] * 100, marker=marcador, s=120, label=nombre)
+    ax.scatter(volatilidad_actual, rendimiento_actual, marker="o", s=80, color="black", label="Tu cartera")
+    ax.set_xlabel("Volatilidad (%)")
+    ax.set_ylabel("Rendimiento esperado (%)")
+    ax.legend(loc="lower right")
+    return fig
 
 # Sidebar para el monto de inversión y fechas
 def sidebar_inversion():
@@ -110,90 +321,6 @@ def cuestionario_perfil_riesgo():
     st.title("Cuestionario de Perfil de Riesgo")
     st.subheader("Responde el siguiente cuestionario para evaluar tu tolerancia al riesgo")
 
-    preguntas_secciones = {
-        1: [
-            "Conozco mis bienes/derechos (activos) y asumo mis deudas/obligaciones (pasivos).",
-            "Me enorgullezco del trabajo que realizo y busco aprovechar al máximo los frutos que obtengo de él.",
-            "Soy auténtico sin necesidad de quedar bien.",
-            "Mi trabajo destaca en mayor medida que el de los demás.",
-            "Busco ayuda de los expertos en el tema.",
-            "Tomo en cuenta la opinión de los especialistas, sin sesgarme únicamente por esta.",
-            "Conozco mis cualidades y me comprometo con mis objetivos.",
-            "Sé cuál es mi lugar y evito ser siempre el primero en todo.",
-            "Acepto que la especulación puede evidenciar que no estaba en lo correcto.",
-            "Cuido mi apariencia sin dedicarle todo el tiempo a ella."
-        ],
-        2: [
-            "Soy adverso a tomar pérdidas, que en mantener las ganancias.",
-            "Si asumo más riesgo y llegara a causar pérdidas, mantengo mi posición a largo plazo.",
-            "Soy consciente de los ciclos económicos y que a largo plazo el capital tiene una tendencia a crecer.",
-            "Compro lo que entiendo y no me importa la opinión ajena.",
-            "Mantengo mi posición.",
-            "Mantengo mi portafolio a pesar de un VaR (pérdidas máximas en $ esperadas en un portafolio de el 5% de las veces) alto.",
-            "Tolero una desviación considerable de mis rendimientos en proporción a la media.",
-            "Busco romper el status quo y terminar los plazos de mis portafolios.",
-            "Prefiero posponer decisiones de compra/venta esperando un mejor escenario.",
-            "Dependo de un margin call o de un piso/techo para tomar una decisión."
-        ],
-        3: [
-            "Soy consciente del riesgo sistémico y actúo de tal manera que puedo conservar por lo menos mi capital a través del tiempo.",
-            "Enfrento mi aversión al riesgo sin perder mis metas financieras.",
-            "He invertido en un activo a pesar del riesgo relacionado con él.",
-            "Tengo experiencias de inversión realizadas por mi cuenta o he acudido con algún intermediario financiero.",
-            "Tomas la decisión de una inversión en corto en búsqueda de potencializar tu posible utilidad.",
-            "Soy más afecto a tomar pérdidas o a esperar utilidades.",
-            "Concuerdo con Peter Lynch: “Solo invierto en lo que entiendo.”",
-            "Reconozco mis expectativas, sin perder de vista el costo de oportunidad al que incurro.",
-            "Postergó mi decisión de tomar pérdidas o utilidades ante la ansiedad de esperar un mejor escenario.",
-            "Reconozco mi aversión al riesgo."
-        ],
-        4: [
-            "Soy ambicioso pero persistente, en lugar de buscar rendimientos cortoplacistas y de riesgo cero.",
-            "Me siento cómodo en mi estatus quo y me quedo así.",
-            "Soy optimista.",
-            "Construyo una imagen de valor, para que un inversionista (compañía o individuo) solicite mi atención.",
-            "Tengo impedimentos (familiares, personales, profesionales, de salud, etc.) que me impiden persistir frente a algún pasivo.",
-            "Tengo metas altas.",
-            "He presentado mis habilidades y aptitudes hacia colegas, para evitar problemas complejos (como la euforia colectiva).",
-            "Busco la mayor eficiencia en mis retornos requeridos.",
-            "Soy perfeccionista.",
-            "Busco la retención de capital a largo plazo en una inversión y cuento con una tasa de rotación de objetivos baja (siendo firme y enfocado en mis compromisos)."
-        ],
-        5: [
-            "Mi capital está trabajando en congruencia con mis necesidades.",
-            "Cuento con metas financieras y procuro su cumplimiento en tiempo y forma.",
-            "Soy coherente.",
-            "Hablo mal a espaldas de las personas.",
-            "Cuido la confidencialidad de la información que se me comparte.",
-            "A pesar del costo de oportunidad inferido, cumplo mis metas.",
-            "Mi riesgo crediticio es alto.",
-            "Tengo un código de conducta.",
-            "Respeto las reglas y normas establecidas para mi actuación financiera.",
-            "¿Me mantengo firme a pesar de la incertidumbre?"
-        ],
-        6: [
-            "Me identifico junto con Warren Buffett al decir: “Tengo miedo cuando los demás son codiciosos.”",
-            "Uso la razón para atender mis prioridades y no dejarme llevar por la emoción de los agentes económicos.",
-            "Me mantengo ecuánime y flexible ante el riesgo no diversificable.",
-            "En presencia de una tendencia determinista y con un nivel de riesgo seleccionado, me alarmo ante una evolución no previsible en la misma desviación estándar (riesgo).",
-            "En una posición larga, me agobio ante las obligaciones del corto plazo.",
-            "Evito las molestias y agobios ante imprevistos.",
-            "Ante un escenario de pérdidas tengo un magical thinking de que mis enemigos son causa del resultado.",
-            "Me quejo mucho.",
-            "Ante un cambio en el nivel de la media predicho, busco alguna manera de volver a ajustar mi asset allocation model.",
-            "Agradezco con facilidad."
-        ],
-        7: [
-            "Llevo registro de las tendencias de mis inversiones para no olvidar su comportamiento histórico.",
-            "Amplío mis horizontes de información y trato de evitar el sesgo de anchoring.",
-            "Solo invierto en lo que conozco y me encamino a preguntar para ampliar mis horizontes.",
-            "Confío en el adagio “Buy the rumor, sell the news.”",
-            "No cambio con facilidad de opinión.",
-            "No me justifico.",
-            "Soy comprometido a pesar de la aleatoriedad de las variables económicas y que, en algunos casos, estas no te generen beneficio."
-        ]
-    }
-
      # Manejo de la sección activa actual
     if "seccion_actual" not in st.session_state:
         st.session_state["seccion_actual"] = 1
@@ -201,25 +328,27 @@ def cuestionario_perfil_riesgo():
     # Obtener la sección activa
     seccion_actual = st.session_state["seccion_actual"]
 
-    # Mostrar preguntas de la sección actual
+    # Respuestas de la sesión: un arreglo int8 indexado por el identificador de la pregunta
+    if "respuestas" not in st.session_state:
+        st.session_state["respuestas"] = hoja_respuestas()
+    respuestas = st.session_state["respuestas"]
+
+    # Mostrar solo las preguntas de la sección actual
     st.subheader(f"Sección {seccion_actual}")
-    respuestas_actuales = {}
-    for pregunta in preguntas_secciones[seccion_actual]:
-        respuesta = st.radio(
-            f"{pregunta}",
-            [1, 2, 3, 4],
-            key=f"seccion_{seccion_actual}_{pregunta}"
+    ids_seccion = IDS_SECCIONES[seccion_actual]
+    for id_pregunta in ids_seccion:
+        respuestas[id_pregunta] = st.radio(
+            PREGUNTAS[id_pregunta],
+            OPCIONES,
+            key=clave_radio(id_pregunta)
         )
-        respuestas_actuales[pregunta] = respuesta
-
-    # Guardar respuestas en el estado
-    st.session_state[f"respuestas_seccion_{seccion_actual}"] = respuestas_actuales
+    fin_etapa("preguntas")
 
     # Botón para continuar a la siguiente sección
     if st.button("Siguiente"):
         # Validar que todas las preguntas fueron respondidas
-        if all(respuesta is not None for respuesta in respuestas_actuales.values()):
-            if seccion_actual < len(preguntas_secciones):
+        if (respuestas[ids_seccion.start:ids_seccion.stop] != SIN_RESPUESTA).all():
+            if seccion_actual < len(PREGUNTAS_SECCIONES):
                 st.session_state["seccion_actual"] += 1
             else:
                 st.success("Has completado todas las secciones del cuestionario.")
@@ -227,19 +356,9 @@ def cuestionario_perfil_riesgo():
             st.warning("Por favor, responde todas las preguntas antes de continuar.")
 
     # Mostrar un mensaje cuando todas las secciones estén completas
-    if seccion_actual == len(preguntas_secciones) and all(
-        f"respuestas_seccion_{i}" in st.session_state for i in range(1, len(preguntas_secciones) + 1)
-    ):
-        total_global = sum(
-            sum(st.session_state[f"respuestas_seccion_{i}"].values())
-            for i in range(1, len(preguntas_secciones) + 1)
-        )
-        if total_global <= 67:
-            nivel_riesgo = "Riesgo Alto"
-        elif 68 <= total_global <= 267:
-            nivel_riesgo = "Riesgo Medio"
-        else:
-            nivel_riesgo = "Aversión al Riesgo Baja"
+    if seccion_actual == len(PREGUNTAS_SECCIONES) and (respuestas != SIN_RESPUESTA).all():
+        total_global = int(respuestas.sum(dtype=np.int64))
+        nivel_riesgo = clasificar_puntaje(total_global)
 
         st.session_state["nivel_riesgo"] = nivel_riesgo
         st.success(f"Tu perfil de riesgo es: {nivel_riesgo}")
@@ -252,42 +371,11 @@ def recomendaciones_etfs():
     st.title("Recomendaciones de ETFs")
     st.subheader("Basadas en tu perfil de riesgo, te sugerimos las siguientes opciones de inversión")
 
-    recomendaciones = {
-        "Riesgo Alto": {
-            "ETFs": ["QQQ", "SPY", "EEM"],
-            "Distribución": [50, 30, 20]
-        },
-        "Riesgo Medio": {
-            "ETFs": ["VTI", "LQD", "GLD"],
-            "Distribución": [40, 40, 20]
-        },
-        "Aversión al Riesgo Baja": {
-            "ETFs": ["BND", "BNDX", "VDC"],
-            "Distribución": [20, 60, 20]
-        }
-    }
-
-    nombres_etfs = {
-        "QQQ": "Invesco QQQ Trust (Tecnología, Nasdaq-100)",
-        "SPY": "SPDR S&P 500 ETF Trust (Acciones del S&P 500)",
-        "EEM": "iShares MSCI Emerging Markets ETF (Mercados Emergentes)",
-        "VTI": "Vanguard Total Stock Market ETF (Mercado Total de EE. UU.)",
-        "LQD": "iShares iBoxx $ Investment Grade Corporate Bond ETF (Bonos Corporativos)",
-        "GLD": "SPDR Gold Shares (Oro)",
-        "BND": "Vanguard Total Bond Market ETF (Bonos de EE. UU.)",
-        "BNDX": "Vanguard Total International Bond ETF (Bonos Internacionales)",
-        "VDC": "Vanguard Consumer Staples ETF (Consumo Básico)"
-    }
-
-    explicaciones_perfil = {
-        "Riesgo Alto": "Seleccionamos ETFs como QQQ, SPY y EEM que se enfocan en sectores con alto potencial de crecimiento "
-                       "(tecnología, mercados emergentes y el S&P 500). Estos instrumentos tienden a ser más volátiles, "
-                       "pero ofrecen mayores rendimientos a largo plazo.",
-        "Riesgo Medio": "Seleccionamos ETFs como VTI, LQD y GLD que diversifican entre acciones generales de mercado, "
-                        "bonos corporativos y oro. Esta combinación busca equilibrio entre riesgo y rendimiento.",
-        "Aversión al Riesgo Baja": "Seleccionamos ETFs como BND, BNDX y VDC que priorizan la estabilidad y la protección del capital. "
-                                   "Estos instrumentos incluyen bonos estadounidenses, internacionales y sectores defensivos."
-    }
+    # Universo de ETFs (se carga una sola vez por proceso desde datos/)
+    universo = cargar_universo()
+    recomendaciones = universo.recomendaciones
+    nombres_etfs = universo.nombres
+    explicaciones_perfil = universo.explicaciones
 
     nivel_riesgo = st.session_state.get("nivel_riesgo", None)
     if nivel_riesgo in recomendaciones:
@@ -323,41 +411,171 @@ def recomendaciones_etfs():
             return
 
         pesos = [st.session_state.asignaciones[etf] / 100 for etf in etfs]
+        fin_etapa("controles")
 
         # Descargar datos para los ETFs seleccionados
-        start_date = st.date_input("Fecha de inicio", datetime.now() - timedelta(days=365 * 10))
-        end_date = st.date_input("Fecha de fin", datetime.now())
-        precios = pd.DataFrame()
-        for etf in etfs:
-            data = download_data(etf, start_date, end_date)
-            precios[etf] = data["Close"]
+        inicio_predeterminado, fin_predeterminado = ventana_predeterminada()
+        start_date = st.date_input("Fecha de inicio", inicio_predeterminado)
+        end_date = st.date_input("Fecha de fin", fin_predeterminado)
+
+        # Si la precarga aún no termina, mostrar lo que ya está listo en lugar de bloquear
+        pendientes = obtener_precargador().pendientes(etfs)
+        if pendientes:
+            st.info(f"Aún estamos descargando los datos de {', '.join(pendientes)}. Los resultados completos aparecerán en unos segundos.")
+            # Los tickers cuya precarga falló no se muestran en la gráfica parcial
+            fallidos = obtener_precargador().fallidos(etfs)
+            if fallidos:
+                st.warning(f"No se pudieron descargar los datos de {', '.join(fallidos)}.")
+            listos = [etf for etf in etfs if etf not in pendientes and etf not in fallidos]
+            if listos:
+                st.subheader("Desempeño Comparativo de los ETFs Recomendados")
+                st.line_chart(AnaliticaCartera(download_data(tuple(listos), start_date, end_date)).precios_grafica(), use_container_width=True)
+            st.button("Actualizar")
+            return
+
+        download_data(tuple(etfs), start_date, end_date)
+        fin_etapa("descarga")
+        analitica = analitica_cacheada(tuple(etfs), start_date, end_date)
+        fin_etapa("construccion_dataframes")
 
         # Gráfica de desempeño comparativo
         st.subheader("Desempeño Comparativo de los ETFs Recomendados")
-        precios_normalizados = precios / precios.iloc[0] * 1000
-        st.line_chart(precios_normalizados, use_container_width=True)
+        st.line_chart(analitica.precios_grafica(), use_container_width=True)
+        fin_etapa("grafica_precios")
 
-        # Cálculo del rendimiento esperado y volatilidad
-        daily_returns = precios.pct_change().dropna()
-        rendimiento_anual = daily_returns.mean() * 252
-        matriz_covarianza = daily_returns.cov() * 252
-
-        rendimiento_esperado = np.dot(pesos, rendimiento_anual) * 100
-        volatilidad_cartera = np.sqrt(np.dot(pesos, np.dot(matriz_covarianza, pesos))) * 100
+        # Cálculo del rendimiento esperado y volatilidad (solo depende de los pesos)
+        rendimiento_esperado, volatilidad_cartera = analitica.estadisticas(pesos)
+        fin_etapa("estadisticas")
 
         st.write("### Resultados de la simulación de cartera:")
         st.write(f"- Rendimiento esperado: {rendimiento_esperado:.2f}%")
         st.write(f"- Volatilidad de la cartera: {volatilidad_cartera:.2f}%")
 
+        # Rendimientos históricos por periodo (anualizados a partir de 3 años)
+        st.write("### Rendimientos históricos por periodo:")
+        st.dataframe(analitica.tabla_rendimientos().style.format("{:.2f}%", na_rep="-"))
+        fin_etapa("rendimientos_periodo")
+
         # Guardar rendimiento esperado en el estado
         st.session_state["expected_return"] = rendimiento_esperado
 
+        # Explorar el resto del universo de ETFs
+        with st.expander("Explorar otros ETFs"):
+            col1, col2, col3 = st.columns(3)
+            perfiles = universo.perfiles()
+            perfil_filtro = col1.selectbox("Perfil", perfiles, index=perfiles.index(nivel_riesgo))
+            clase_filtro = col2.selectbox("Clase de activo", ["Todas"] + universo.clases_activo())
+            region_filtro = col3.selectbox("Región", ["Todas"] + universo.regiones())
+            filtrados = universo.filtrar(
+                perfil=perfil_filtro,
+                clase_activo=None if clase_filtro == "Todas" else clase_filtro,
+                region=None if region_filtro == "Todas" else region_filtro
+            )
+            st.dataframe(
+                filtrados[["ticker", "nombre", "clase_activo", "region"]].rename(columns={
+                    "ticker": "Ticker", "nombre": "Nombre", "clase_activo": "Clase de activo", "region": "Región"
+                }),
+                hide_index=True
+            )
+            if st.checkbox("Mostrar rendimientos históricos de estos ETFs"):
+                st.dataframe(
+                    rendimientos_universo(tuple(filtrados["ticker"]), end_date).style.format("{:.2f}%", na_rep="-")
+                )
+        fin_etapa("universo")
+
+        # Lo que sigue (frontera, simulación, riesgo y backtest) necesita precios de todos los ETFs
+        if analitica.tickers_sin_datos:
+            st.error(f"No hay precios de {', '.join(analitica.tickers_sin_datos)} en este periodo. Elige otras fechas o ajusta la cartera para ver el resto del análisis.")
+            return
+
+        # Frontera eficiente de los ETFs recomendados
+        with st.expander("Frontera eficiente"):
+            optimo = frontera_cacheada(tuple(etfs), start_date, end_date)
+            st.pyplot(grafica_frontera(optimo, rendimiento_esperado, volatilidad_cartera))
+            carteras_optimas = pd.DataFrame({
+                "Máximo Sharpe": optimo["max_sharpe"],
+                "Mínima varianza": optimo["min_varianza"]
+            }).T * 100
+            st.dataframe(carteras_optimas.style.format("{:.2f}%"))
+            col1, col2 = st.columns(2)
+            for col, nombre in ((col1, "Máximo Sharpe"), (col2, "Mínima varianza")):
+                if col.button(f"Usar cartera de {nombre[0].lower()}{nombre[1:]}"):
+                    porcentajes = redondear_pesos(carteras_optimas.loc[nombre, etfs] / 100)
+                    st.session_state.asignaciones = dict(zip(etfs, porcentajes))
+                    st.rerun()
+        fin_etapa("frontera")
+
+        # Simulación Monte Carlo de la cartera
+        with st.expander("Simulación Monte Carlo"):
+            col1, col2, col3 = st.columns(3)
+            valor_inicial = col1.number_input("Monto a invertir", min_value=1000, value=10000, step=1000)
+            anios_simulacion = col2.slider("Horizonte (años)", min_value=1, max_value=30, value=10)
+            n_trayectorias = col3.selectbox("Trayectorias", [1000, 10000, 100000], index=1)
+            if st.checkbox("Ejecutar simulación"):
+                simulacion = simulacion_montecarlo(
+                    analitica.rendimiento_anual,
+                    analitica.matriz_covarianza,
+                    pesos,
+                    anios_simulacion,
+                    n_trayectorias,
+                    valor_inicial
+                )
+                st.pyplot(grafica_abanico(simulacion["percentiles"]))
+                st.write(f"Pérdidas máximas esperadas con {simulacion['nivel']:.0%} de confianza:")
+                st.dataframe(simulacion["riesgo"].style.format("${:,.2f}"))
+        fin_etapa("montecarlo")
+
         # Gráfico del rendimiento histórico de la cartera
-        precios_normalizados = precios / precios.iloc[0]
-        rendimiento_cartera = (precios_normalizados * pesos).sum(axis=1)
+        rendimiento_cartera = analitica.curva(pesos)
 
         st.subheader("Rendimiento Histórico de la Cartera")
-        st.line_chart(rendimiento_cartera, use_container_width=True)
+        st.line_chart(reducir_serie(rendimiento_cartera), use_container_width=True)
+        fin_etapa("grafica_cartera")
+
+        # Panel de riesgo de la cartera y de cada ETF
+        with st.expander("Análisis de riesgo"):
+            rendimientos_cartera = rendimiento_cartera.pct_change().dropna()
+            tabla_riesgo = pd.concat([
+                metricas_riesgo(rendimientos_cartera, rendimientos_mercado(start_date, end_date)),
+                riesgo_cacheado(tuple(etfs), start_date, end_date)
+            ])
+            st.dataframe(
+                tabla_riesgo.style.format("{:.2f}").format("{:.0f}", subset=["Duración de la caída (días)"])
+            )
+            st.caption(f"VaR a un día. Beta calculada contra {TICKER_MERCADO}.")
+            st.write("Volatilidad móvil anualizada (%) a 3 meses")
+            volatilidades = volatilidad_movil(pd.concat([rendimientos_cartera, analitica.daily_returns], axis=1))
+            st.line_chart(reducir_tabla(volatilidades), use_container_width=True)
+        fin_etapa("riesgo")
+
+        # Backtest con rebalanceo periódico, costos y aportaciones
+        with st.expander("Backtest con rebalanceo"):
+            plan = st.session_state.get("plan_aportaciones", {"Inicial": 1000, "Periódica": 100})
+            col1, col2, col3, col4 = st.columns(4)
+            aportacion_inicial = col1.number_input("Aportación inicial", min_value=0, value=plan["Inicial"], step=100)
+            aportacion_periodica = col2.number_input("Aportación mensual", min_value=0, value=plan["Periódica"], step=10)
+            costo = col3.number_input("Costo por operación (%)", min_value=0.0, max_value=5.0, value=0.10, step=0.05)
+            umbral = col4.number_input("Umbral de rebalanceo (%)", min_value=1.0, max_value=50.0, value=5.0, step=1.0)
+            if aportacion_inicial > 0 and st.checkbox("Comparar políticas de rebalanceo"):
+                curvas, resumen = comparar_politicas(
+                    analitica.precios,
+                    pesos,
+                    umbral=umbral / 100,
+                    costo_transaccion=costo / 100,
+                    aportacion_inicial=aportacion_inicial,
+                    aportacion_periodica=aportacion_periodica
+                )
+                st.line_chart(reducir_tabla(curvas), use_container_width=True)
+                st.dataframe(resumen.style.format({
+                    "Valor final": "${:,.2f}",
+                    "Aportado": "${:,.2f}",
+                    "Rendimiento anualizado (%)": "{:.2f}%",
+                    "Volatilidad (%)": "{:.2f}%",
+                    "Máxima caída (%)": "{:.2f}%",
+                    "Costos": "${:,.2f}",
+                    "Rebalanceos": "{:.0f}"
+                }))
+        fin_etapa("backtest")
 
     else:
         st.warning("Completa el cuestionario para recibir recomendaciones.")
@@ -399,32 +617,26 @@ def calculadora_interes_compuesto():
             help="Duración total de la inversión en años."
         )
 
-        # Simulación de interés compuesto
-        num_aportaciones_anuales = 12  # Frecuencia mensual fija
-        tasa_aportacion = (1 + (rendimiento_esperado / 100)) ** (1 / num_aportaciones_anuales) - 1
-
-        # Inicializar los valores de inversión y ahorro
-        patrimonio_inversion = [aportacion_inicial]
-        patrimonio_ahorro = [aportacion_inicial]
+        # Guardar el plan de aportaciones para el backtest de la cartera
+        st.session_state["plan_aportaciones"] = {"Inicial": aportacion_inicial, "Periódica": aportacion_periodica}
+        fin_etapa("controles")
 
-        for _ in range(horizonte_inversion * num_aportaciones_anuales):
-            # Cálculo con interés compuesto
-            nuevo_valor_inversion = patrimonio_inversion[-1] + aportacion_periodica
-            nuevo_valor_inversion *= (1 + tasa_aportacion)
-            patrimonio_inversion.append(nuevo_valor_inversion)
-
-            # Cálculo sin interés (ahorro simple)
-            patrimonio_ahorro.append(patrimonio_ahorro[-1] + aportacion_periodica)
+        # Simulación de interés compuesto (trayectoria completa en una sola pasada)
+        patrimonio_inversion, patrimonio_ahorro = proyectar_patrimonio(
+            aportacion_inicial, aportacion_periodica, horizonte_inversion, rendimiento_esperado
+        )
 
         # Crear un DataFrame para los datos de la gráfica
         inversion_df = pd.DataFrame({
             "Inversión con Rendimiento": patrimonio_inversion,
             "Ahorro sin Rendimiento": patrimonio_ahorro
         })
+        fin_etapa("proyeccion")
 
         # Mostrar gráfico
         st.subheader("Crecimiento de tu inversión a lo largo del tiempo")
         st.line_chart(inversion_df)
+        fin_etapa("grafica")
 
         # Mostrar resultados finales
         valor_final_inversion = patrimonio_inversion[-1]
@@ -442,18 +654,52 @@ def calculadora_interes_compuesto():
             f"</h3>",
             unsafe_allow_html=True
         )
+
+        # Tabla de sensibilidad: valor final por horizonte y rendimiento anual
+        with st.expander("Sensibilidad del valor final"):
+            horizontes = [5, 10, 15, 20, 25, 30]
+            rendimientos = [rendimiento_esperado + delta for delta in (-4, -2, 0, 2, 4)]
+            valores_finales = malla_valores_finales(
+                [aportacion_inicial], [aportacion_periodica], horizontes, rendimientos
+            )[0, 0]
+            st.dataframe(
+                pd.DataFrame(
+                    valores_finales,
+                    index=[f"{h} años" for h in horizontes],
+                    columns=[f"{r:.2f}%" for r in rendimientos]
+                ).style.format("${:,.2f}")
+            )
+        fin_etapa("sensibilidad")
     else:
         st.warning("Por favor, completa la configuración de inversión y cálculo de rendimiento esperado antes de usar esta herramienta.")
 
 
+# Panel de depuración con los tiempos de la ejecución actual (se activa con ?debug=1)
+def panel_depuracion(registro):
+    metricas = registro.a_dict()
+    st.sidebar.header("Depuración")
+    st.sidebar.write(f"Página: {metricas['pagina']} - Total: {metricas['total_ms']:.1f} ms")
+    if metricas["etapas"]:
+        st.sidebar.dataframe(pd.DataFrame(metricas["etapas"]), hide_index=True)
+    if metricas["cache"]:
+        st.sidebar.dataframe(pd.DataFrame(metricas["cache"]).T)
+
+
 # Navegación entre páginas
 # Bloque de navegación
-if st.session_state["current_page"] == "registro":
-    registro_cliente()
-elif st.session_state["current_page"] == "cuestionario":
-    cuestionario_perfil_riesgo()
-elif st.session_state["current_page"] == "recomendaciones":
-    recomendaciones_etfs()
-elif st.session_state["current_page"] == "calculadora":
-    calculadora_interes_compuesto()
+configurar_log_metricas()
+with medir_pagina(st.session_state["current_page"]) as registro:
+    if st.session_state["current_page"] == "registro":
+        registro_cliente()
+    elif st.session_state["current_page"] == "cuestionario":
+        cuestionario_perfil_riesgo()
+    elif st.session_state["current_page"] == "recomendaciones":
+        recomendaciones_etfs()
+    elif st.session_state["current_page"] == "calculadora":
+        calculadora_interes_compuesto()
+    guardar_sesion()
+    fin_etapa("guardar_sesion")
+
+if st.query_params.get("debug") == "1":
+    panel_depuracion(registro)
 
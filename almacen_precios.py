@@ -0,0 +1,242 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Almacén local de precios de cierre por ticker y día.
+# Cada ticker se guarda en su propia carpeta como un solo arreglo de NumPy con
+# fechas (días desde 1970) y cierres, que se lee con mmap, junto con los intervalos
+# de fechas que ya se consultaron a la fuente. Al estar en un solo archivo que se
+# reemplaza de forma atómica, otros procesos (réplicas, reportes.py) nunca leen
+# fechas de una escritura con cierres de otra. Las escrituras de un mismo ticker
+# se serializan entre procesos con un candado de archivo, para que la cobertura
+# guardada siempre corresponda a los cierres guardados.
+
+DIRECTORIO_PREDETERMINADO = os.environ.get("SIMULADOR_CACHE_PRECIOS", os.path.join(".cache", "precios"))
+
+# Huecos de hasta este número de días pueden no tener datos (fines de semana y feriados)
+DIAS_SIN_MERCADO = 4
+
+TIPO_SERIE = np.dtype([("fecha", np.int64), ("cierre", np.float64)])
+
+
+# Función para convertir una fecha (date, datetime, str o Timestamp) a días desde 1970
+def a_dia(fecha):
+    return int(np.datetime64(pd.Timestamp(fecha).date(), "D").astype(np.int64))
+
+
+# Función para convertir días desde 1970 a fecha
+def a_fecha(dia):
+    return pd.Timestamp(np.datetime64(int(dia), "D")).date()
+
+
+# Fuente de datos de Yahoo Finance: descarga varios tickers en una sola llamada
+class FuenteYahoo:
+    def descargar(self, tickers, inicio, fin):
+        import yfinance as yf
+
+        data = yf.download(
+            list(tickers), start=inicio, end=fin, group_by="column", progress=False, threads=True
+        )
+        return extraer_cierres(data, tickers)
+
+
+# Fuente de datos en memoria, útil para trabajar sin conexión
+class FuenteMemoria:
+    def __init__(self, precios):
+        self.precios = precios.sort_index()
+        self.llamadas = []
+
+    def descargar(self, tickers, inicio, fin):
+        self.llamadas.append((tuple(tickers), inicio, fin))
+        indice = self.precios.index
+        mascara = (indice >= pd.Timestamp(inicio)) & (indice < pd.Timestamp(fin))
+        columnas = [ticker for ticker in tickers if ticker in self.precios.columns]
+        return self.precios.loc[mascara, columnas]
+
+
+# Función para obtener los cierres de una descarga de yfinance con uno o varios tickers
+def extraer_cierres(data, tickers):
+    if data is None or data.empty:
+        return pd.DataFrame(columns=list(tickers), dtype=float)
+    if isinstance(data.columns, pd.MultiIndex):
+        cierres = data["Close"]
+    else:
+        cierres = data[["Close"]].rename(columns={"Close": tickers[0]})
+    cierres.index = pd.DatetimeIndex(cierres.index).tz_localize(None).normalize()
+    return cierres.reindex(columns=list(tickers))
+
+
+# Función para bloquear un archivo de forma exclusiva entre procesos mientras dura el bloque
+@contextmanager
+def candado_archivo(ruta):
+    with open(ruta, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# Función para unir intervalos [inicio, fin) que se traslapan o se tocan
+def unir_intervalos(intervalos):
+    unidos = []
+    for inicio, fin in sorted(intervalos):
+        if unidos and inicio <= unidos[-1][1]:
+            unidos[-1][1] = max(unidos[-1][1], fin)
+        else:
+            unidos.append([inicio, fin])
+    return unidos
+
+
+# Función para obtener los huecos de [inicio, fin) que no cubren los intervalos
+def huecos(intervalos, inicio, fin):
+    faltantes = []
+    cursor = inicio
+    for a, b in unir_intervalos(intervalos):
+        if b <= cursor:
+            continue
+        if a >= fin:
+            break
+        if a > cursor:
+            faltantes.append((cursor, min(a, fin)))
+        cursor = max(cursor, b)
+    if cursor < fin:
+        faltantes.append((cursor, fin))
+    return faltantes
+
+
+class AlmacenPrecios:
+    def __init__(self, directorio=DIRECTORIO_PREDETERMINADO, fuente=None):
+        self.directorio = directorio
+        self.fuente = fuente if fuente is not None else FuenteYahoo()
+        self._candados = {}
+        self._candado_global = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+
+    def _candado(self, ticker):
+        with self._candado_global:
+            return self._candados.setdefault(ticker, threading.Lock())
+
+    def _ruta(self, ticker, archivo):
+        return os.path.join(self.directorio, ticker.replace("/", "_"), archivo)
+
+    # Leer los intervalos ya consultados para un ticker
+    def cobertura(self, ticker):
+        try:
+            with open(self._ruta(ticker, "cobertura.json"), encoding="utf-8") as f:
+                return [tuple(intervalo) for intervalo in json.load(f)]
+        except FileNotFoundError:
+            return []
+
+    # Leer las fechas y cierres guardados para un ticker (con mmap)
+    def leer(self, ticker):
+        try:
+            serie = np.load(self._ruta(ticker, "serie.npy"), mmap_mode="r")
+        except FileNotFoundError:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        return serie["fecha"], serie["cierre"]
+
+    # Días faltantes de un ticker dentro de [inicio, fin)
+    def faltantes(self, ticker, inicio, fin):
+        return huecos(self.cobertura(ticker), a_dia(inicio), self._limite(a_dia(fin)))
+
+    def cubre(self, ticker, inicio, fin):
+        return not self.faltantes(ticker, inicio, fin)
+
+    # El día de hoy nunca se marca como cubierto porque su cierre aún puede cambiar
+    def _limite(self, fin):
+        return min(fin, a_dia(date.today()))
+
+    # Unir los cierres nuevos con los guardados. Leer, unir y reemplazar se hace con el
+    # candado del ticker tomado, también entre procesos, para no perder lo que otro
+    # proceso haya escrito entre la lectura de la serie y la de la cobertura.
+    def _escribir(self, ticker, dias, valores, inicio, fin):
+        os.makedirs(os.path.dirname(self._ruta(ticker, "serie.npy")), exist_ok=True)
+        with self._candado(ticker), candado_archivo(self._ruta(ticker, "escritura.lock")):
+            fechas, cierres = self.leer(ticker)
+            # Los datos nuevos van primero para que reemplacen a los guardados en días repetidos
+            todas_fechas, posiciones = np.unique(
+                np.concatenate([dias, np.asarray(fechas)]), return_index=True
+            )
+            todos_cierres = np.concatenate([valores, np.asarray(cierres)])[posiciones]
+
+            cobertura = self.cobertura(ticker)
+            limite = self._limite(fin)
+            if inicio < limite:
+                cobertura.append((inicio, limite))
+
+            serie = np.empty(len(todas_fechas), dtype=TIPO_SERIE)
+            serie["fecha"] = todas_fechas
+            serie["cierre"] = todos_cierres
+
+            temporal = self._ruta(ticker, f"serie.npy.{os.getpid()}.tmp")
+            with open(temporal, "wb") as f:
+                np.save(f, serie)
+            os.replace(temporal, self._ruta(ticker, "serie.npy"))
+            temporal = self._ruta(ticker, f"cobertura.json.{os.getpid()}.tmp")
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(unir_intervalos(cobertura), f)
+            os.replace(temporal, self._ruta(ticker, "cobertura.json"))
+
+    # Descargar solo los rangos faltantes; los tickers con el mismo hueco se piden juntos
+    def actualizar(self, tickers, inicio, fin):
+        grupos = {}
+        for ticker in tickers:
+            for hueco in self.faltantes(ticker, inicio, fin):
+                grupos.setdefault(hueco, []).append(ticker)
+
+        for (dia_inicio, dia_fin), grupo in grupos.items():
+            cierres = self.fuente.descargar(grupo, a_fecha(dia_inicio), a_fecha(dia_fin))
+            dias = (
+                pd.DatetimeIndex(cierres.index).values.astype("datetime64[D]").astype(np.int64)
+                if len(cierres)
+                else np.empty(0, dtype=np.int64)
+            )
+            for ticker in grupo:
+                if ticker in cierres.columns:
+                    valores = cierres[ticker].to_numpy(dtype=np.float64)
+                else:
+                    valores = np.full(len(dias), np.nan)
+                validos = ~np.isnan(valores)
+                # Un ticker sin datos en un rango largo suele ser un fallo de la fuente (en una
+                # descarga de varios tickers llega como columna vacía): no se marca como cubierto
+                # para volver a intentarlo después
+                if not validos.any() and dia_fin - dia_inicio > DIAS_SIN_MERCADO:
+                    continue
+                self._escribir(ticker, dias[validos], valores[validos], dia_inicio, dia_fin)
+        return len(grupos)
+
+    # Precios de cierre de varios tickers en [inicio, fin) como DataFrame (una columna por ticker)
+    def precios(self, tickers, inicio, fin):
+        self.actualizar(tickers, inicio, fin)
+        dia_inicio, dia_fin = a_dia(inicio), a_dia(fin)
+        columnas = {}
+        for ticker in tickers:
+            fechas, cierres = self.leer(ticker)
+            a = np.searchsorted(fechas, dia_inicio, side="left")
+            b = np.searchsorted(fechas, dia_fin, side="left")
+            fechas, cierres = np.array(fechas[a:b]), np.array(cierres[a:b])
+            indice = pd.DatetimeIndex(fechas.astype("datetime64[D]"))
+            columnas[ticker] = pd.Series(cierres, index=indice)
+        precios = pd.DataFrame(columnas, columns=list(tickers))
+        precios.index.name = "Date"
+        return precios
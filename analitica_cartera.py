@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+from graficas import reducir_tabla
+
+# Estadísticas de una cartera que solo dependen de los precios.
+# Se calculan una sola vez por (tickers, fecha de inicio, fecha de fin); los
+# resultados que dependen de los pesos se obtienen después con productos
+# matriz-vector baratos.
+
+DIAS_HABILES_ANIO = 252
+
+
+# Periodos de la tabla de rendimientos: desplazamientos de calendario o "YTD" (desde el
+# cierre del año anterior). También se aceptan enteros (número de días hábiles hacia atrás).
+PERIODOS_RENDIMIENTO = {
+    "1M": pd.DateOffset(months=1),
+    "3M": pd.DateOffset(months=3),
+    "YTD": "YTD",
+    "1A": pd.DateOffset(years=1),
+    "3A": pd.DateOffset(years=3),
+    "5A": pd.DateOffset(years=5),
+    "10A": pd.DateOffset(years=10),
+}
+
+
+# Función para calcular rendimientos históricos de todos los tickers y periodos a la vez.
+# Cada ticker usa su último precio disponible y el último precio en o antes de la fecha
+# de inicio del periodo; si el ticker no cotizaba en esa fecha el resultado es NaN.
+# Los periodos mayores a un año se anualizan.
+def calcular_rendimientos(precios, periodos=PERIODOS_RENDIMIENTO, anualizar=True):
+    precios = precios.sort_index()
+    indice = pd.DatetimeIndex(precios.index)
+    matriz = precios.ffill().to_numpy(dtype=float)
+    n_dias = len(matriz)
+    if n_dias == 0:
+        return pd.DataFrame(np.nan, index=precios.columns, columns=list(periodos))
+
+    validos = ~np.isnan(precios.to_numpy(dtype=float))
+    primera_valida = np.where(validos.any(axis=0), validos.argmax(axis=0), n_dias)
+    fecha_final = indice[-1]
+
+    # Fila de inicio y años transcurridos de cada periodo
+    filas = np.empty(len(periodos), dtype=np.intp)
+    anios = np.empty(len(periodos))
+    for i, periodo in enumerate(periodos.values()):
+        if isinstance(periodo, (int, np.integer)):
+            filas[i] = n_dias - 1 - periodo
+            anios[i] = periodo / DIAS_HABILES_ANIO
+            continue
+        if isinstance(periodo, str) and periodo.upper() == "YTD":
+            fecha_inicio = pd.Timestamp(fecha_final.year - 1, 12, 31)
+        else:
+            fecha_inicio = fecha_final - periodo
+        filas[i] = indice.searchsorted(fecha_inicio, side="right") - 1
+        anios[i] = (fecha_final - fecha_inicio).days / 365.25
+
+    # Un solo acceso indexado para todos los periodos: (periodos x tickers)
+    filas_validas = np.clip(filas, 0, n_dias - 1)
+    base = matriz[filas_validas]
+    rendimientos = matriz[-1] / base - 1
+    sin_historia = (filas[:, None] < 0) | (filas[:, None] < primera_valida[None, :])
+    rendimientos[sin_historia] = np.nan
+
+    if anualizar:
+        largos = anios > 1
+        rendimientos[largos] = (1 + rendimientos[largos]) ** (1 / anios[largos, None]) - 1
+
+    return pd.DataFrame(
+        np.round(rendimientos.T * 100, 2), index=precios.columns, columns=list(periodos)
+    )
+
+
+class AnaliticaCartera:
+    def __init__(self, precios):
+        self.precios_completos = precios
+        # Fechas en que cotizan todos los tickers con datos; los tickers sin ningún
+        # precio se conservan como columnas vacías y sus estadísticas quedan en NaN
+        con_datos = precios.columns[precios.notna().any()]
+        self.precios = precios[con_datos].dropna().reindex(columns=precios.columns)
+        self.tickers = list(self.precios.columns)
+        self.tickers_sin_datos = list(self.precios.columns[self.precios.isna().all()])
+
+        # Precios normalizados (base 1 y base 1000 para la gráfica comparativa)
+        self.precios_normalizados = self.precios / self.precios.iloc[:1].to_numpy()
+        self.precios_indice = self.precios_normalizados * 1000
+        self._matriz_normalizada = self.precios_normalizados.to_numpy()
+
+        # Rendimientos diarios y sus momentos anualizados
+        self.daily_returns = self.precios.pct_change().iloc[1:]
+        self.rendimiento_anual = self.daily_returns.mean() * DIAS_HABILES_ANIO
+        self.matriz_covarianza = self.daily_returns.cov() * DIAS_HABILES_ANIO
+        self._vector_rendimiento = self.rendimiento_anual.to_numpy()
+        self._matriz_covarianza = self.matriz_covarianza.to_numpy()
+        self._tabla_rendimientos = None
+        self._precios_grafica = None
+
+    # Rendimiento esperado y volatilidad anualizados de la cartera, en porcentaje
+    def estadisticas(self, pesos):
+        pesos = np.asarray(pesos, dtype=float)
+        rendimiento_esperado = pesos @ self._vector_rendimiento * 100
+        volatilidad_cartera = np.sqrt(pesos @ self._matriz_covarianza @ pesos) * 100
+        return rendimiento_esperado, volatilidad_cartera
+
+    # Valor histórico de la cartera comprando y manteniendo los pesos iniciales (base 1)
+    def curva(self, pesos):
+        return pd.Series(
+            self._matriz_normalizada @ np.asarray(pesos, dtype=float),
+            index=self.precios.index,
+            name="Cartera",
+        )
+
+    # Tabla de rendimientos por periodo (se calcula una vez sobre los precios sin recortar)
+    def tabla_rendimientos(self):
+        if self._tabla_rendimientos is None:
+            self._tabla_rendimientos = calcular_rendimientos(self.precios_completos)
+        return self._tabla_rendimientos
+
+    # Precios base 1000 reducidos a la resolución de la gráfica (una vez por ventana de datos)
+    def precios_grafica(self):
+        if self._precios_grafica is None:
+            self._precios_grafica = reducir_tabla(self.precios_indice)
+        return self._precios_grafica
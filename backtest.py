@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+from analitica_cartera import DIAS_HABILES_ANIO
+
+# Backtest histórico de una cartera sobre la matriz de precios de los ETFs.
+# Entre dos eventos (aportación o rebalanceo) las unidades de cada ETF no cambian,
+# así que el valor de cada tramo se obtiene con un solo producto matriz-vector.
+# Políticas disponibles:
+#   "ninguno"     comprar y mantener (las aportaciones se compran con los pesos objetivo)
+#   "mensual"     rebalanceo el primer día hábil de cada mes
+#   "trimestral"  rebalanceo el primer día hábil de cada trimestre
+#   "umbral"      rebalanceo cuando algún peso se aleja más que `umbral` del objetivo
+
+POLITICAS = {
+    "ninguno": "Comprar y mantener",
+    "mensual": "Rebalanceo mensual",
+    "trimestral": "Rebalanceo trimestral",
+    "umbral": "Rebalanceo por umbral",
+}
+
+
+# Función para obtener las posiciones del primer día hábil de cada periodo (sin contar el día 0)
+def inicios_de_periodo(indice, frecuencia):
+    periodos = pd.DatetimeIndex(indice).to_period(frecuencia).asi8
+    return np.flatnonzero(np.diff(periodos) != 0) + 1
+
+
+# Función para simular una política de rebalanceo sobre los precios históricos
+def simular_politica(
+    precios,
+    pesos,
+    politica="mensual",
+    umbral=0.05,
+    costo_transaccion=0.001,
+    aportacion_inicial=1000,
+    aportacion_periodica=100,
+):
+    if politica not in POLITICAS:
+        raise ValueError(f"Política de rebalanceo desconocida: {politica}")
+    matriz = precios.to_numpy(dtype=float)
+    objetivo = np.asarray(pesos, dtype=float)
+    objetivo = objetivo / objetivo.sum()
+    n_dias = len(matriz)
+
+    # Días con aportación y días con rebalanceo por calendario
+    mensuales = inicios_de_periodo(precios.index, "M")
+    dias_aportacion = mensuales if aportacion_periodica > 0 else np.empty(0, dtype=np.intp)
+    if politica == "mensual":
+        dias_rebalanceo = mensuales
+    elif politica == "trimestral":
+        dias_rebalanceo = inicios_de_periodo(precios.index, "Q")
+    else:
+        dias_rebalanceo = np.empty(0, dtype=np.intp)
+    eventos = np.union1d(dias_aportacion, dias_rebalanceo)
+    es_aportacion = np.isin(eventos, dias_aportacion)
+    es_rebalanceo = np.isin(eventos, dias_rebalanceo)
+
+    valores = np.empty(n_dias)
+    flujos = np.zeros(n_dias)
+    costos = 0.0
+    rebalanceos = 0
+
+    # Rebalancear (o comprar) hasta los pesos objetivo con el valor disponible en el día t
+    def rebalancear(unidades, t, efectivo):
+        nonlocal costos
+        tenencias = matriz[t] * unidades
+        total = tenencias.sum() + efectivo
+        costo = costo_transaccion * np.abs(objetivo * total - tenencias).sum()
+        costos += costo
+        return objetivo * (total - costo) / matriz[t]
+
+    # Comprar las aportaciones con los pesos objetivo sin tocar lo que ya se tiene
+    def comprar(unidades, t, efectivo):
+        nonlocal costos
+        costos += costo_transaccion * efectivo
+        return unidades + objetivo * efectivo * (1 - costo_transaccion) / matriz[t]
+
+    unidades = comprar(np.zeros(len(objetivo)), 0, aportacion_inicial)
+    flujos[0] = aportacion_inicial
+    limites = np.concatenate([[0], eventos, [n_dias]])
+
+    for k in range(len(limites) - 1):
+        inicio, fin = limites[k], limites[k + 1]
+        if k > 0:
+            efectivo = aportacion_periodica if es_aportacion[k - 1] else 0.0
+            flujos[inicio] = efectivo
+            if es_rebalanceo[k - 1]:
+                unidades = rebalancear(unidades, inicio, efectivo)
+                rebalanceos += 1
+            elif efectivo:
+                unidades = comprar(unidades, inicio, efectivo)
+
+        if politica != "umbral":
+            valores[inicio:fin] = matriz[inicio:fin] @ unidades
+            continue
+
+        # Por umbral: buscar de forma vectorizada el primer día del tramo que rompe el umbral
+        while inicio < fin:
+            tenencias = matriz[inicio:fin] * unidades
+            valores[inicio:fin] = tenencias.sum(axis=1)
+            desvio = np.abs(tenencias / valores[inicio:fin, None] - objetivo).max(axis=1)
+            rompe = np.flatnonzero(desvio > umbral)
+            if len(rompe) == 0:
+                break
+            dia = inicio + rompe[0]
+            unidades = rebalancear(unidades, dia, 0.0)
+            valores[dia] = matriz[dia] @ unidades
+            rebalanceos += 1
+            inicio = dia + 1
+
+    valor = pd.Series(valores, index=precios.index, name=POLITICAS[politica])
+    return {
+        "valor": valor,
+        "aportado": pd.Series(np.cumsum(flujos), index=precios.index, name="Aportado"),
+        "flujos": pd.Series(flujos, index=precios.index, name="Flujos"),
+        "costos": costos,
+        "rebalanceos": rebalanceos,
+    }
+
+
+# Función para obtener el rendimiento diario ponderado en el tiempo (sin el efecto de las aportaciones)
+def rendimientos_ponderados(resultado):
+    valor = resultado["valor"].to_numpy()
+    flujos = resultado["flujos"].to_numpy()
+    return pd.Series((valor[1:] - flujos[1:]) / valor[:-1] - 1, index=resultado["valor"].index[1:])
+
+
+# Función para comparar varias políticas sobre los mismos precios
+def comparar_politicas(precios, pesos, politicas=tuple(POLITICAS), **parametros):
+    curvas = {}
+    resumen = {}
+    for politica in politicas:
+        resultado = simular_politica(precios, pesos, politica=politica, **parametros)
+        rendimientos = rendimientos_ponderados(resultado)
+        indice = np.cumprod(1 + rendimientos.to_numpy())
+        anios = len(rendimientos) / DIAS_HABILES_ANIO
+        caida = indice / np.maximum.accumulate(indice) - 1
+
+        nombre = POLITICAS[politica]
+        curvas[nombre] = resultado["valor"]
+        resumen[nombre] = {
+            "Valor final": resultado["valor"].iloc[-1],
+            "Aportado": resultado["aportado"].iloc[-1],
+            "Rendimiento anualizado (%)": (indice[-1] ** (1 / anios) - 1) * 100 if anios > 0 else np.nan,
+            "Volatilidad (%)": rendimientos.std() * np.sqrt(DIAS_HABILES_ANIO) * 100,
+            "Máxima caída (%)": caida.min() * 100 if len(caida) else 0.0,
+            "Costos": resultado["costos"],
+            "Rebalanceos": resultado["rebalanceos"],
+        }
+    return pd.DataFrame(curvas), pd.DataFrame(resumen).T
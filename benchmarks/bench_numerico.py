@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# Benchmarks reproducibles de los cálculos numéricos de la aplicación, fuera de Streamlit.
+# Cada caso corre sobre un panel sintético de precios (semilla fija) y reporta el
+# mejor tiempo, la mediana, el rendimiento (celdas del panel por segundo) y el pico
+# de memoria. La comparación con la línea base usa la mediana, que es más estable.
+#
+#   python benchmarks/bench_numerico.py                      # correr y comparar con la línea base
+#   python benchmarks/bench_numerico.py --guardar-linea-base # guardar los resultados como línea base
+#   python benchmarks/bench_numerico.py --rapido             # solo paneles pequeños
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from analitica_cartera import AnaliticaCartera, calcular_rendimientos  # noqa: E402
+from interes_compuesto import barrido_escenarios, proyectar_patrimonio  # noqa: E402
+
+LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "linea_base.json")
+
+TICKERS = (3, 30, 100, 500)
+ANIOS = (1, 5, 10, 30)
+TICKERS_RAPIDO = (3, 30)
+ANIOS_RAPIDO = (1, 10)
+
+# Función para generar un panel sintético de precios diarios (caminata geométrica correlacionada)
+def panel_sintetico(n_tickers, anios, semilla=0):
+    rng = np.random.default_rng(semilla)
+    n_dias = anios * 252
+    mercado = rng.normal(0.0003, 0.01, (n_dias, 1))
+    propios = rng.normal(0.0, 0.008, (n_dias, n_tickers))
+    precios = 100 * np.exp(np.cumsum(mercado + propios, axis=0))
+    # Algunos ETFs empiezan a cotizar después del inicio del panel
+    inicios = rng.integers(0, n_dias // 10 + 1, n_tickers)
+    precios[np.arange(n_dias)[:, None] < inicios[None, :]] = np.nan
+    indice = pd.bdate_range("2000-01-03", periods=n_dias)
+    return pd.DataFrame(precios, index=indice, columns=[f"ETF{i:03d}" for i in range(n_tickers)])
+
+
+# Casos: cada uno prepara los datos y devuelve la función a medir y el número de
+# elementos que procesa (celdas del panel, meses o escenarios x meses)
+def caso_rendimientos(precios):
+    return lambda: calcular_rendimientos(precios), precios.size
+
+
+def caso_covarianza(precios):
+    pesos = np.full(precios.shape[1], 1 / precios.shape[1])
+
+    def correr():
+        analitica = AnaliticaCartera(precios)
+        return analitica.estadisticas(pesos)
+    return correr, precios.size
+
+
+def caso_interes_compuesto(precios):
+    anios = max(1, len(precios) // 252)
+    return lambda: proyectar_patrimonio(1000, 100, anios, 8.0), anios * 12 + 1
+
+
+def caso_barrido(precios):
+    anios = max(1, len(precios) // 252)
+    iniciales = np.linspace(0, 100_000, 11)
+    periodicas = np.linspace(0, 5_000, 11)
+    rendimientos = np.linspace(-2, 12, 15)
+    escenarios = len(iniciales) * len(periodicas) * len(rendimientos)
+    return lambda: barrido_escenarios(iniciales, periodicas, [anios], rendimientos), escenarios * (anios * 12 + 1)
+
+
+CASOS = {
+    "calcular_rendimientos": caso_rendimientos,
+    "covarianza_volatilidad": caso_covarianza,
+    "interes_compuesto": caso_interes_compuesto,
+    "barrido_escenarios": caso_barrido,
+}
+
+
+# Función para medir un caso: mejor tiempo y mediana de varias rondas, y pico de memoria.
+# Cada ronda repite la función hasta durar al menos `duracion_ronda` segundos y se toma
+# el promedio por llamada, así los casos de pocos milisegundos no dependen de una sola
+# medición ruidosa.
+def medir(funcion, repeticiones, duracion_ronda=0.1):
+    funcion()  # calentamiento
+    inicio = time.perf_counter()
+    funcion()
+    iteraciones = max(1, int(duracion_ronda / max(time.perf_counter() - inicio, 1e-9)))
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(iteraciones):
+            funcion()
+        tiempos.append((time.perf_counter() - inicio) / iteraciones)
+
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(tiempos), float(np.median(tiempos)), pico
+
+
+def correr(tickers, anios, casos, repeticiones):
+    resultados = {}
+    for n_tickers in tickers:
+        for n_anios in anios:
+            precios = panel_sintetico(n_tickers, n_anios)
+            for nombre in casos:
+                funcion, elementos = CASOS[nombre](precios)
+                segundos, mediana, pico = medir(funcion, repeticiones)
+                clave = f"{nombre}/{n_tickers}t/{n_anios}a"
+                resultados[clave] = {
+                    "segundos": segundos,
+                    "segundos_mediana": mediana,
+                    "elementos_por_segundo": elementos / segundos if segundos > 0 else float("inf"),
+                    "pico_memoria_mb": pico / 2**20,
+                }
+                print(
+                    f"{clave:<40} {segundos * 1000:>10.3f} ms {mediana * 1000:>10.3f} ms (mediana)"
+                    f" {elementos / segundos / 1e6:>12.2f} Melem/s"
+                    f" {pico / 2**20:>10.2f} MB",
+                    flush=True,
+                )
+    return resultados
+
+
+# Función para comparar con la línea base; devuelve la lista de regresiones.
+# Se comparan las medianas; las diferencias absolutas menores a la holgura (2 ms o
+# 0.5 MB) se consideran ruido. Las métricas que no están en la línea base se omiten.
+HOLGURAS = {"segundos_mediana": 0.002, "pico_memoria_mb": 0.5}
+
+
+def comparar(resultados, linea_base, tolerancia):
+    regresiones = []
+    for clave, actual in resultados.items():
+        base = linea_base.get("resultados", {}).get(clave)
+        if base is None:
+            continue
+        for metrica, holgura in HOLGURAS.items():
+            if metrica not in base:
+                continue
+            if actual[metrica] > max(base[metrica] * (1 + tolerancia), base[metrica] + holgura):
+                regresiones.append(
+                    f"{clave}: {metrica} {actual[metrica]:.6g} > {base[metrica]:.6g} (+{tolerancia:.0%})"
+                )
+    return regresiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de los cálculos numéricos del simulador.")
+    parser.add_argument("--rapido", action="store_true", help="solo paneles pequeños")
+    parser.add_argument("--casos", nargs="+", choices=list(CASOS), default=list(CASOS))
+    parser.add_argument("--repeticiones", type=int, default=7, help="rondas por caso (se compara la mediana)")
+    parser.add_argument("--linea-base", default=LINEA_BASE, help="archivo JSON con la línea base")
+    parser.add_argument("--guardar-linea-base", action="store_true", help="guardar los resultados como línea base")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="regresión permitida (0.25 = 25%%)")
+    parser.add_argument("--salida", help="guardar los resultados de esta corrida en JSON")
+    args = parser.parse_args()
+
+    resultados = correr(
+        TICKERS_RAPIDO if args.rapido else TICKERS,
+        ANIOS_RAPIDO if args.rapido else ANIOS,
+        args.casos,
+        args.repeticiones,
+    )
+    documento = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "maquina": platform.machine(),
+        "resultados": resultados,
+    }
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(documento, f, indent=2)
+
+    if args.guardar_linea_base:
+        with open(args.linea_base, "w", encoding="utf-8") as f:
+            json.dump(documento, f, indent=2)
+        print(f"Línea base guardada en {args.linea_base}")
+        sys.exit(0)
+
+    if not os.path.exists(args.linea_base):
+        print(f"No hay línea base en {args.linea_base}; usa --guardar-linea-base para crearla.")
+        sys.exit(0)
+
+    with open(args.linea_base, encoding="utf-8") as f:
+        regresiones = comparar(resultados, json.load(f), args.tolerancia)
+    if regresiones:
+        print("Regresiones respecto a la línea base:")
+        for regresion in regresiones:
+            print(f"  {regresion}")
+        sys.exit(1)
+    print("Sin regresiones respecto a la línea base.")
@@ -0,0 +1,209 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Caché compartida entre procesos y réplicas para precios y resultados derivados
+# (rendimientos, covarianzas, fronteras). Los valores se guardan serializados y
+# comprimidos en SQLite con tiempo de vida (TTL) y un presupuesto de tamaño; al
+# pasarse del presupuesto se eliminan las entradas usadas hace más tiempo (LRU).
+# CacheMemoria ofrece la misma interfaz en memoria, útil para pruebas.
+
+RUTA_PREDETERMINADA = os.environ.get("SIMULADOR_CACHE_DB", os.path.join(".cache", "simulador.sqlite"))
+LIMITE_MB_PREDETERMINADO = float(os.environ.get("SIMULADOR_CACHE_MB", 512))
+TTL_PREDETERMINADO = float(os.environ.get("SIMULADOR_CACHE_TTL", 24 * 3600))
+
+# Versión del formato de los valores guardados. Las claves la incluyen, así que al
+# incrementarla (por ejemplo, si cambian los atributos de una clase que se guarda
+# serializada) las réplicas con código nuevo ignoran las entradas anteriores.
+VERSION_CACHE = 2
+
+
+# Función para construir una clave estable a partir de varias partes (tickers, fechas, etc.)
+def clave_cache(*partes):
+    texto = repr((VERSION_CACHE,) + partes)
+    return f"{partes[0]}:v{VERSION_CACHE}:{hashlib.sha1(texto.encode('utf-8')).hexdigest()}"
+
+
+def serializar(valor):
+    return zlib.compress(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+
+def deserializar(datos):
+    return pickle.loads(zlib.decompress(datos))
+
+
+class CacheSQLite:
+    def __init__(self, ruta=RUTA_PREDETERMINADA, limite_mb=LIMITE_MB_PREDETERMINADO, ttl=TTL_PREDETERMINADO, reloj=time.time):
+        self.ruta = ruta
+        self.limite_bytes = int(limite_mb * 2**20)
+        self.ttl = ttl
+        self.reloj = reloj
+        self.aciertos = 0
+        self.fallos = 0
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with self._conexion() as conexion:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS entradas ("
+                " clave TEXT PRIMARY KEY,"
+                " valor BLOB NOT NULL,"
+                " tamano INTEGER NOT NULL,"
+                " expira REAL NOT NULL,"
+                " ultimo_acceso REAL NOT NULL)"
+            )
+            conexion.execute("CREATE INDEX IF NOT EXISTS entradas_acceso ON entradas (ultimo_acceso)")
+
+    # Una conexión por operación: así se puede usar desde varios hilos y procesos.
+    # La transacción se confirma al salir del bloque (o se revierte si hubo error).
+    @contextmanager
+    def _conexion(self):
+        conexion = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            with conexion:
+                yield conexion
+        finally:
+            conexion.close()
+
+    def obtener(self, clave, predeterminado=None):
+        ahora = self.reloj()
+        with self._conexion() as conexion:
+            fila = conexion.execute("SELECT valor, expira FROM entradas WHERE clave = ?", (clave,)).fetchone()
+            if fila is None or fila[1] <= ahora:
+                if fila is not None:
+                    conexion.execute("DELETE FROM entradas WHERE clave = ?", (clave,))
+                self.fallos += 1
+                return predeterminado
+            conexion.execute("UPDATE entradas SET ultimo_acceso = ? WHERE clave = ?", (ahora, clave))
+        self.aciertos += 1
+        return deserializar(fila[0])
+
+    def guardar(self, clave, valor, ttl=None):
+        datos = serializar(valor)
+        if len(datos) > self.limite_bytes:
+            return False
+        ahora = self.reloj()
+        with self._conexion() as conexion:
+            conexion.execute(
+                "INSERT OR REPLACE INTO entradas (clave, valor, tamano, expira, ultimo_acceso) VALUES (?, ?, ?, ?, ?)",
+                (clave, datos, len(datos), ahora + (self.ttl if ttl is None else ttl), ahora),
+            )
+            self._desalojar(conexion, ahora)
+        return True
+
+    # Eliminar expiradas y, si se excede el presupuesto, las menos usadas recientemente
+    def _desalojar(self, conexion, ahora):
+        conexion.execute("DELETE FROM entradas WHERE expira <= ?", (ahora,))
+        total = conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM entradas").fetchone()[0]
+        if total <= self.limite_bytes:
+            return
+        exceso = total - self.limite_bytes
+        liberado = 0
+        eliminar = []
+        for clave, tamano in conexion.execute("SELECT clave, tamano FROM entradas ORDER BY ultimo_acceso"):
+            eliminar.append((clave,))
+            liberado += tamano
+            if liberado >= exceso:
+                break
+        conexion.executemany("DELETE FROM entradas WHERE clave = ?", eliminar)
+
+    # Si se da `compartir`, el valor calculado solo se guarda cuando compartir(valor) es verdadero
+    # (por ejemplo, para no servir a las demás réplicas resultados de una descarga incompleta)
+    def obtener_o_calcular(self, clave, funcion, ttl=None, compartir=None):
+        faltante = object()
+        valor = self.obtener(clave, faltante)
+        if valor is faltante:
+            valor = funcion()
+            if compartir is None or compartir(valor):
+                self.guardar(clave, valor, ttl)
+        return valor
+
+    def eliminar(self, clave):
+        with self._conexion() as conexion:
+            conexion.execute("DELETE FROM entradas WHERE clave = ?", (clave,))
+
+    def tamano_total(self):
+        with self._conexion() as conexion:
+            return conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM entradas").fetchone()[0]
+
+    def __len__(self):
+        with self._conexion() as conexion:
+            return conexion.execute("SELECT COUNT(*) FROM entradas").fetchone()[0]
+
+    def limpiar(self):
+        with self._conexion() as conexion:
+            conexion.execute("DELETE FROM entradas")
+
+
+# Caché en memoria con la misma interfaz (TTL, LRU y presupuesto de tamaño)
+class CacheMemoria:
+    def __init__(self, limite_mb=LIMITE_MB_PREDETERMINADO, ttl=TTL_PREDETERMINADO, reloj=time.time):
+        self.limite_bytes = int(limite_mb * 2**20)
+        self.ttl = ttl
+        self.reloj = reloj
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()
+        self._total = 0
+        self._candado = threading.Lock()
+
+    def obtener(self, clave, predeterminado=None):
+        with self._candado:
+            entrada = self._entradas.get(clave)
+            if entrada is None or entrada[1] <= self.reloj():
+                if entrada is not None:
+                    self._quitar(clave)
+                self.fallos += 1
+                return predeterminado
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return deserializar(entrada[0])
+
+    def guardar(self, clave, valor, ttl=None):
+        datos = serializar(valor)
+        if len(datos) > self.limite_bytes:
+            return False
+        with self._candado:
+            if clave in self._entradas:
+                self._quitar(clave)
+            self._entradas[clave] = (datos, self.reloj() + (self.ttl if ttl is None else ttl))
+            self._total += len(datos)
+            while self._total > self.limite_bytes:
+                self._quitar(next(iter(self._entradas)))
+        return True
+
+    def _quitar(self, clave):
+        datos, _ = self._entradas.pop(clave)
+        self._total -= len(datos)
+
+    def obtener_o_calcular(self, clave, funcion, ttl=None, compartir=None):
+        faltante = object()
+        valor = self.obtener(clave, faltante)
+        if valor is faltante:
+            valor = funcion()
+            if compartir is None or compartir(valor):
+                self.guardar(clave, valor, ttl)
+        return valor
+
+    def eliminar(self, clave):
+        with self._candado:
+            if clave in self._entradas:
+                self._quitar(clave)
+
+    def tamano_total(self):
+        return self._total
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def limpiar(self):
+        with self._candado:
+            self._entradas.clear()
+            self._total = 0
@@ -0,0 +1,177 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Banco de preguntas y calificación del cuestionario de perfil de riesgo.
+# No depende de Streamlit: la página del cuestionario y la calificación por lotes
+# (por ejemplo, una exportación del CRM en CSV) usan las mismas funciones.
+
+OPCIONES = [1, 2, 3, 4]
+
+PREGUNTAS_SECCIONES = {
+    1: [
+        "Conozco mis bienes/derechos (activos) y asumo mis deudas/obligaciones (pasivos).",
+        "Me enorgullezco del trabajo que realizo y busco aprovechar al máximo los frutos que obtengo de él.",
+        "Soy auténtico sin necesidad de quedar bien.",
+        "Mi trabajo destaca en mayor medida que el de los demás.",
+        "Busco ayuda de los expertos en el tema.",
+        "Tomo en cuenta la opinión de los especialistas, sin sesgarme únicamente por esta.",
+        "Conozco mis cualidades y me comprometo con mis objetivos.",
+        "Sé cuál es mi lugar y evito ser siempre el primero en todo.",
+        "Acepto que la especulación puede evidenciar que no estaba en lo correcto.",
+        "Cuido mi apariencia sin dedicarle todo el tiempo a ella."
+    ],
+    2: [
+        "Soy adverso a tomar pérdidas, que en mantener las ganancias.",
+        "Si asumo más riesgo y llegara a causar pérdidas, mantengo mi posición a largo plazo.",
+        "Soy consciente de los ciclos económicos y que a largo plazo el capital tiene una tendencia a crecer.",
+        "Compro lo que entiendo y no me importa la opinión ajena.",
+        "Mantengo mi posición.",
+        "Mantengo mi portafolio a pesar de un VaR (pérdidas máximas en $ esperadas en un portafolio de el 5% de las veces) alto.",
+        "Tolero una desviación considerable de mis rendimientos en proporción a la media.",
+        "Busco romper el status quo y terminar los plazos de mis portafolios.",
+        "Prefiero posponer decisiones de compra/venta esperando un mejor escenario.",
+        "Dependo de un margin call o de un piso/techo para tomar una decisión."
+    ],
+    3: [
+        "Soy consciente del riesgo sistémico y actúo de tal manera que puedo conservar por lo menos mi capital a través del tiempo.",
+        "Enfrento mi aversión al riesgo sin perder mis metas financieras.",
+        "He invertido en un activo a pesar del riesgo relacionado con él.",
+        "Tengo experiencias de inversión realizadas por mi cuenta o he acudido con algún intermediario financiero.",
+        "Tomas la decisión de una inversión en corto en búsqueda de potencializar tu posible utilidad.",
+        "Soy más afecto a tomar pérdidas o a esperar utilidades.",
+        "Concuerdo con Peter Lynch: “Solo invierto en lo que entiendo.”",
+        "Reconozco mis expectativas, sin perder de vista el costo de oportunidad al que incurro.",
+        "Postergó mi decisión de tomar pérdidas o utilidades ante la ansiedad de esperar un mejor escenario.",
+        "Reconozco mi aversión al riesgo."
+    ],
+    4: [
+        "Soy ambicioso pero persistente, en lugar de buscar rendimientos cortoplacistas y de riesgo cero.",
+        "Me siento cómodo en mi estatus quo y me quedo así.",
+        "Soy optimista.",
+        "Construyo una imagen de valor, para que un inversionista (compañía o individuo) solicite mi atención.",
+        "Tengo impedimentos (familiares, personales, profesionales, de salud, etc.) que me impiden persistir frente a algún pasivo.",
+        "Tengo metas altas.",
+        "He presentado mis habilidades y aptitudes hacia colegas, para evitar problemas complejos (como la euforia colectiva).",
+        "Busco la mayor eficiencia en mis retornos requeridos.",
+        "Soy perfeccionista.",
+        "Busco la retención de capital a largo plazo en una inversión y cuento con una tasa de rotación de objetivos baja (siendo firme y enfocado en mis compromisos)."
+    ],
+    5: [
+        "Mi capital está trabajando en congruencia con mis necesidades.",
+        "Cuento con metas financieras y procuro su cumplimiento en tiempo y forma.",
+        "Soy coherente.",
+        "Hablo mal a espaldas de las personas.",
+        "Cuido la confidencialidad de la información que se me comparte.",
+        "A pesar del costo de oportunidad inferido, cumplo mis metas.",
+        "Mi riesgo crediticio es alto.",
+        "Tengo un código de conducta.",
+        "Respeto las reglas y normas establecidas para mi actuación financiera.",
+        "¿Me mantengo firme a pesar de la incertidumbre?"
+    ],
+    6: [
+        "Me identifico junto con Warren Buffett al decir: “Tengo miedo cuando los demás son codiciosos.”",
+        "Uso la razón para atender mis prioridades y no dejarme llevar por la emoción de los agentes económicos.",
+        "Me mantengo ecuánime y flexible ante el riesgo no diversificable.",
+        "En presencia de una tendencia determinista y con un nivel de riesgo seleccionado, me alarmo ante una evolución no previsible en la misma desviación estándar (riesgo).",
+        "En una posición larga, me agobio ante las obligaciones del corto plazo.",
+        "Evito las molestias y agobios ante imprevistos.",
+        "Ante un escenario de pérdidas tengo un magical thinking de que mis enemigos son causa del resultado.",
+        "Me quejo mucho.",
+        "Ante un cambio en el nivel de la media predicho, busco alguna manera de volver a ajustar mi asset allocation model.",
+        "Agradezco con facilidad."
+    ],
+    7: [
+        "Llevo registro de las tendencias de mis inversiones para no olvidar su comportamiento histórico.",
+        "Amplío mis horizontes de información y trato de evitar el sesgo de anchoring.",
+        "Solo invierto en lo que conozco y me encamino a preguntar para ampliar mis horizontes.",
+        "Confío en el adagio “Buy the rumor, sell the news.”",
+        "No cambio con facilidad de opinión.",
+        "No me justifico.",
+        "Soy comprometido a pesar de la aleatoriedad de las variables económicas y que, en algunos casos, estas no te generen beneficio."
+    ]
+}
+
+# Cada pregunta se identifica con un entero (0 a 66) según su posición en el banco
+PREGUNTAS = tuple(pregunta for preguntas in PREGUNTAS_SECCIONES.values() for pregunta in preguntas)
+NUM_PREGUNTAS = len(PREGUNTAS)
+
+
+# Función para obtener el rango de identificadores de cada sección
+def _ids_por_seccion():
+    ids, inicio = {}, 0
+    for seccion, preguntas in PREGUNTAS_SECCIONES.items():
+        ids[seccion] = range(inicio, inicio + len(preguntas))
+        inicio += len(preguntas)
+    return ids
+
+
+IDS_SECCIONES = _ids_por_seccion()
+
+# Las respuestas de una sesión se guardan en un arreglo int8 de 67 posiciones; 0 = sin responder
+SIN_RESPUESTA = 0
+
+
+# Función para crear el arreglo de respuestas vacío de una sesión
+def hoja_respuestas():
+    return np.zeros(NUM_PREGUNTAS, dtype=np.int8)
+
+# Columnas esperadas en un archivo de respuestas: p1, p2, ..., p67
+COLUMNAS_PREGUNTAS = [f"p{i}" for i in range(1, NUM_PREGUNTAS + 1)]
+
+# Perfiles según el puntaje total: hasta 67, de 68 a 267 y más de 267
+UMBRALES = [(67, "Riesgo Alto"), (267, "Riesgo Medio")]
+PERFIL_SUPERIOR = "Aversión al Riesgo Baja"
+
+
+# Función para asignar el perfil de riesgo a uno o varios puntajes totales
+def clasificar_puntaje(totales):
+    totales = np.asarray(totales)
+    perfiles = np.full(totales.shape, PERFIL_SUPERIOR, dtype=object)
+    for limite, perfil in reversed(UMBRALES):
+        perfiles[totales <= limite] = perfil
+    return perfiles if perfiles.ndim else perfiles.item()
+
+
+# Función para calificar una matriz de respuestas (un cliente por fila, 67 columnas)
+def puntuar_respuestas(respuestas):
+    respuestas = np.asarray(respuestas)
+    if respuestas.ndim != 2 or respuestas.shape[1] != NUM_PREGUNTAS:
+        raise ValueError(f"Se esperaban {NUM_PREGUNTAS} respuestas por cliente.")
+    invalidas = ~np.isin(respuestas, OPCIONES)
+    if invalidas.any():
+        fila, columna = np.argwhere(invalidas)[0]
+        raise ValueError(f"Respuesta inválida en la fila {fila + 1}, pregunta {columna + 1}: {respuestas[fila, columna]}")
+    totales = respuestas.astype(np.int64).sum(axis=1)
+    return totales, clasificar_puntaje(totales)
+
+
+# Función para calificar un DataFrame con las columnas p1..p67; conserva las demás columnas
+def puntuar_tabla(tabla):
+    faltantes = [columna for columna in COLUMNAS_PREGUNTAS if columna not in tabla.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas de respuestas: {', '.join(faltantes)}")
+    totales, perfiles = puntuar_respuestas(tabla[COLUMNAS_PREGUNTAS].to_numpy())
+    resultado = tabla.drop(columns=COLUMNAS_PREGUNTAS)
+    resultado["puntaje"] = totales
+    resultado["nivel_riesgo"] = perfiles
+    return resultado
+
+
+# Función para calificar un archivo CSV de respuestas
+def puntuar_csv(ruta):
+    return puntuar_tabla(pd.read_csv(ruta))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Califica en lote el cuestionario de perfil de riesgo.")
+    parser.add_argument("entrada", help="CSV con las columnas p1..p67 (una fila por cliente)")
+    parser.add_argument("-o", "--salida", help="CSV de salida (por defecto se imprime en pantalla)")
+    args = parser.parse_args()
+
+    resultado = puntuar_csv(args.entrada)
+    if args.salida:
+        resultado.to_csv(args.salida, index=False)
+    else:
+        print(resultado.to_csv(index=False), end="")
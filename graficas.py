@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+# Reducción de series largas a la resolución de la gráfica.
+# Enviar todos los puntos diarios al navegador no agrega detalle visible: una
+# gráfica de ~800 px de ancho no puede mostrar más de ~800 puntos por serie.
+# Las series individuales se reducen con LTTB (Largest-Triangle-Three-Buckets),
+# que conserva la forma visual, más el mínimo y el máximo de cada tramo; las tablas
+# de varias columnas se reducen tomando el mínimo y el máximo de cada columna en
+# cada tramo. En ambos casos los picos y las caídas siguen apareciendo en la gráfica.
+
+PUNTOS_GRAFICA = 800
+
+
+# Función para convertir el índice en números (fechas en nanosegundos o posiciones)
+def _eje_x(indice):
+    if isinstance(indice, pd.DatetimeIndex):
+        return indice.asi8.astype(float)
+    if pd.api.types.is_numeric_dtype(indice):
+        return np.asarray(indice, dtype=float)
+    return np.arange(len(indice), dtype=float)
+
+
+# Función para elegir n posiciones de la serie (x, y) con el algoritmo LTTB.
+# Se conservan siempre el primer y el último punto; en cada tramo intermedio se
+# elige el punto que forma el triángulo más grande con el punto elegido en el
+# tramo anterior y el promedio del tramo siguiente.
+def indices_lttb(x, y, n):
+    total = len(y)
+    if n >= total or n < 3:
+        return np.arange(total)
+
+    limites = np.linspace(1, total - 1, n - 1).astype(np.intp)
+    # Promedio de cada tramo (con sumas acumuladas, sin recorrer los puntos)
+    suma_x = np.concatenate([[0.0], np.cumsum(x)])
+    suma_y = np.concatenate([[0.0], np.cumsum(y)])
+    conteo = np.maximum(limites[1:] - limites[:-1], 1)
+    promedio_x = (suma_x[limites[1:]] - suma_x[limites[:-1]]) / conteo
+    promedio_y = (suma_y[limites[1:]] - suma_y[limites[:-1]]) / conteo
+
+    elegidos = np.empty(n, dtype=np.intp)
+    elegidos[0] = 0
+    elegidos[-1] = total - 1
+    anterior = 0
+    for i in range(n - 2):
+        inicio, fin = limites[i], max(limites[i + 1], limites[i] + 1)
+        siguiente_x = promedio_x[i + 1] if i + 1 < n - 2 else x[-1]
+        siguiente_y = promedio_y[i + 1] if i + 1 < n - 2 else y[-1]
+        areas = np.abs(
+            (x[anterior] - siguiente_x) * (y[inicio:fin] - y[anterior])
+            - (x[anterior] - x[inicio:fin]) * (siguiente_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        elegidos[i + 1] = anterior
+    return elegidos
+
+
+# Función para elegir las filas con el mínimo y el máximo de cada columna en cada tramo.
+# Con varias columnas se usan menos tramos para que el total de filas no pase de n.
+def indices_min_max(matriz, n):
+    total, columnas = matriz.shape
+    tramos = max(1, n // (2 * max(columnas, 1)))
+    if total <= n or tramos >= total:
+        return np.arange(total)
+
+    limites = np.linspace(0, total, tramos + 1).astype(np.intp)[:-1]
+    tramo = np.repeat(np.arange(tramos), np.diff(np.append(limites, total)))
+    filas = [np.array([0, total - 1])]
+    for valores in (np.fmin.reduceat(matriz, limites, axis=0), np.fmax.reduceat(matriz, limites, axis=0)):
+        coincide = matriz == valores[tramo]
+        for j in range(columnas):
+            posiciones = np.flatnonzero(coincide[:, j])
+            # Primera fila de cada tramo donde la columna alcanza el extremo
+            _, primeras = np.unique(tramo[posiciones], return_index=True)
+            filas.append(posiciones[primeras])
+    return np.unique(np.concatenate(filas))
+
+
+# Función para reducir una serie a ~n puntos: la mitad con LTTB y la otra mitad con los
+# mínimos y máximos por tramo (LTTB por sí solo no garantiza conservar los extremos)
+def reducir_serie(serie, n=PUNTOS_GRAFICA):
+    serie = serie.dropna()
+    if len(serie) <= n:
+        return serie
+    valores = serie.to_numpy(dtype=float)
+    indices = np.union1d(
+        indices_lttb(_eje_x(serie.index), valores, max(3, n // 2)),
+        indices_min_max(valores[:, None], n // 2),
+    )
+    return serie.iloc[indices]
+
+
+# Función para reducir una tabla (una columna por serie) a ~n filas con mínimos y máximos
+def reducir_tabla(tabla, n=PUNTOS_GRAFICA):
+    if len(tabla) <= n:
+        return tabla
+    if tabla.shape[1] == 1:
+        return reducir_serie(tabla.iloc[:, 0], n).to_frame()
+    return tabla.iloc[indices_min_max(tabla.to_numpy(dtype=float), n)]
@@ -0,0 +1,117 @@
+import contextvars
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+
+# Medición de tiempos por etapa y de aciertos/fallos de caché.
+# Cada ejecución de una página crea un RegistroTiempos; las etapas y las llamadas
+# a funciones cacheadas se anotan en el registro activo y al terminar se exporta
+# como una línea JSON en el logger "simulador.metricas".
+
+logger = logging.getLogger("simulador.metricas")
+
+_registro_actual = contextvars.ContextVar("registro_actual", default=None)
+
+
+class RegistroTiempos:
+    def __init__(self, pagina):
+        self.pagina = pagina
+        self.inicio = datetime.now(timezone.utc)
+        self.total = None
+        self.etapas = []
+        self.cache = {}
+        self._ultima_marca = time.perf_counter()
+
+    def agregar_etapa(self, nombre, segundos):
+        self.etapas.append((nombre, segundos))
+
+    # Cerrar una etapa secuencial: mide el tiempo desde la marca anterior
+    def marcar(self, nombre):
+        ahora = time.perf_counter()
+        self.agregar_etapa(nombre, ahora - self._ultima_marca)
+        self._ultima_marca = ahora
+
+    def _contador(self, funcion):
+        return self.cache.setdefault(funcion, {"llamadas": 0, "fallos": 0})
+
+    def registrar_llamada(self, funcion):
+        self._contador(funcion)["llamadas"] += 1
+
+    def registrar_fallo(self, funcion):
+        self._contador(funcion)["fallos"] += 1
+
+    def a_dict(self):
+        return {
+            "pagina": self.pagina,
+            "inicio": self.inicio.isoformat(),
+            "total_ms": None if self.total is None else round(self.total * 1000, 3),
+            "etapas": [{"etapa": nombre, "ms": round(segundos * 1000, 3)} for nombre, segundos in self.etapas],
+            "cache": {
+                funcion: {
+                    "aciertos": contador["llamadas"] - contador["fallos"],
+                    "fallos": contador["fallos"],
+                }
+                for funcion, contador in self.cache.items()
+            },
+        }
+
+
+# Función para configurar la salida del logger de métricas (una sola vez por proceso).
+# Si la variable SIMULADOR_LOG_METRICAS tiene una ruta, las líneas JSON se agregan a
+# ese archivo; si no, se escriben en la salida de errores.
+def configurar_log_metricas(ruta=None, nivel=logging.INFO):
+    if logger.handlers:
+        return logger
+    ruta = ruta or os.environ.get("SIMULADOR_LOG_METRICAS")
+    manejador = logging.FileHandler(ruta, encoding="utf-8") if ruta else logging.StreamHandler()
+    manejador.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(manejador)
+    logger.setLevel(nivel)
+    logger.propagate = False
+    return logger
+
+
+# Medir una ejecución completa de una página
+@contextmanager
+def medir_pagina(pagina):
+    registro = RegistroTiempos(pagina)
+    token = _registro_actual.set(registro)
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro.total = time.perf_counter() - inicio
+        _registro_actual.reset(token)
+        logger.info(json.dumps(registro.a_dict(), ensure_ascii=False))
+
+
+# Cerrar una etapa secuencial de la página activa (sin tener que anidar bloques)
+def fin_etapa(nombre):
+    registro = _registro_actual.get()
+    if registro is not None:
+        registro.marcar(nombre)
+
+
+# Decorador para contar las llamadas a una función cacheada; se coloca encima del
+# decorador de caché y el cuerpo de la función llama a marcar_fallo, que solo se
+# ejecuta cuando el valor no estaba en caché
+def contar_llamadas(nombre):
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            registro = _registro_actual.get()
+            if registro is not None:
+                registro.registrar_llamada(nombre)
+            return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def marcar_fallo(nombre):
+    registro = _registro_actual.get()
+    if registro is not None:
+        registro.registrar_fallo(nombre)
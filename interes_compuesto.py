@@ -0,0 +1,86 @@
+import numpy as np
+
+# Motor de interés compuesto con aportaciones mensuales.
+# Cada mes se suma la aportación periódica y el saldo crece a la tasa mensual,
+# por lo que después de n meses:
+#   V_n = P (1 + r)^n + C (1 + r) ((1 + r)^n - 1) / r
+# y sin rendimiento (ahorro simple) V_n = P + C n.
+
+NUM_APORTACIONES_ANUALES = 12  # Frecuencia mensual fija
+
+
+# Función para convertir un rendimiento anual en porcentaje a una tasa mensual equivalente
+def tasa_mensual(rendimiento_anual):
+    return (1 + np.asarray(rendimiento_anual, dtype=float) / 100) ** (1 / NUM_APORTACIONES_ANUALES) - 1
+
+
+# Función para calcular el saldo después de n meses (acepta arreglos con broadcasting)
+def valor_compuesto(aportacion_inicial, aportacion_periodica, meses, tasa):
+    aportacion_inicial = np.asarray(aportacion_inicial, dtype=float)
+    aportacion_periodica = np.asarray(aportacion_periodica, dtype=float)
+    meses = np.asarray(meses, dtype=float)
+    tasa = np.asarray(tasa, dtype=float)
+
+    factor = (1 + tasa) ** meses
+    # Con tasa cero la anualidad se reduce a C * n
+    sin_tasa = tasa == 0
+    anualidad = np.where(
+        sin_tasa, meses, (1 + tasa) * (factor - 1) / np.where(sin_tasa, 1, tasa)
+    )
+    return aportacion_inicial * factor + aportacion_periodica * anualidad
+
+
+# Función para proyectar mes a mes el patrimonio con y sin rendimiento
+def proyectar_patrimonio(aportacion_inicial, aportacion_periodica, horizonte_anios, rendimiento_anual):
+    meses = np.arange(horizonte_anios * NUM_APORTACIONES_ANUALES + 1)
+    patrimonio_inversion = valor_compuesto(
+        aportacion_inicial, aportacion_periodica, meses, tasa_mensual(rendimiento_anual)
+    )
+    patrimonio_ahorro = aportacion_inicial + aportacion_periodica * meses.astype(float)
+    return patrimonio_inversion, patrimonio_ahorro
+
+
+# Función para evaluar muchas combinaciones de escenarios a la vez.
+# Las entradas se combinan como producto cartesiano y el resultado es un arreglo
+# 2-D (escenarios x meses); los meses posteriores al horizonte de cada escenario
+# quedan como NaN.
+def barrido_escenarios(aportaciones_iniciales, aportaciones_periodicas, horizontes_anios, rendimientos_anuales):
+    iniciales, periodicas, horizontes, rendimientos = (
+        malla.ravel()
+        for malla in np.meshgrid(
+            np.asarray(aportaciones_iniciales, dtype=float),
+            np.asarray(aportaciones_periodicas, dtype=float),
+            np.asarray(horizontes_anios, dtype=int),
+            np.asarray(rendimientos_anuales, dtype=float),
+            indexing="ij",
+        )
+    )
+    meses_horizonte = horizontes * NUM_APORTACIONES_ANUALES
+    meses = np.arange(meses_horizonte.max() + 1)
+
+    trayectorias = valor_compuesto(
+        iniciales[:, None], periodicas[:, None], meses[None, :], tasa_mensual(rendimientos)[:, None]
+    )
+    trayectorias[meses[None, :] > meses_horizonte[:, None]] = np.nan
+
+    escenarios = {
+        "Aportación inicial": iniciales,
+        "Aportación periódica": periodicas,
+        "Horizonte (años)": horizontes,
+        "Rendimiento anual (%)": rendimientos,
+    }
+    return escenarios, trayectorias
+
+
+# Función para obtener solo los valores finales de cada escenario como una malla
+# con forma (iniciales, periódicas, horizontes, rendimientos)
+def malla_valores_finales(aportaciones_iniciales, aportaciones_periodicas, horizontes_anios, rendimientos_anuales):
+    iniciales, periodicas, horizontes, rendimientos = np.ix_(
+        np.asarray(aportaciones_iniciales, dtype=float),
+        np.asarray(aportaciones_periodicas, dtype=float),
+        np.asarray(horizontes_anios, dtype=int),
+        np.asarray(rendimientos_anuales, dtype=float),
+    )
+    return valor_compuesto(
+        iniciales, periodicas, horizontes * NUM_APORTACIONES_ANUALES, tasa_mensual(rendimientos)
+    )
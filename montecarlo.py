@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+# Simulación Monte Carlo de la cartera a partir del rendimiento anual esperado
+# y la matriz de covarianza anualizada de los ETFs.
+# Los rendimientos mensuales de los activos se generan correlacionados con el
+# factor de Cholesky de la covarianza mensual, por lotes de tamaño acotado.
+# De cada lote solo se conservan los meses de una malla (unos 60 puntos más los
+# horizontes del VaR), así la memoria no crece con el número de meses.
+
+MESES_POR_ANIO = 12
+PERCENTILES = (5, 25, 50, 75, 95)
+MAX_ELEMENTOS_LOTE = 4_000_000  # Números aleatorios por lote (~16 MB en float32)
+PUNTOS_TRAYECTORIA = 60
+
+
+# Función para obtener el factor de Cholesky; si la matriz no es definida positiva
+# (por ejemplo, dos ETFs casi idénticos) se agrega una pequeña diagonal
+def factor_cholesky(matriz_covarianza):
+    matriz = np.asarray(matriz_covarianza, dtype=float)
+    ajuste = 0.0
+    for _ in range(10):
+        try:
+            return np.linalg.cholesky(matriz + ajuste * np.eye(len(matriz)))
+        except np.linalg.LinAlgError:
+            ajuste = max(ajuste * 10, 1e-12 * np.trace(matriz) / len(matriz))
+    raise ValueError("La matriz de covarianza no es semidefinida positiva.")
+
+
+# Función para elegir los meses que se guardan: una malla regular, el año 1 y el horizonte
+def malla_meses(meses, puntos=PUNTOS_TRAYECTORIA):
+    paso = max(1, meses // puntos)
+    return np.unique(np.concatenate([np.arange(0, meses + 1, paso), [min(MESES_POR_ANIO, meses), meses]]))
+
+
+# Simular un lote de trayectorias del valor de la cartera (valor inicial = 1); devuelve
+# solo los meses de la malla
+def _simular_lote(semilla, tam_lote, media_mensual, cholesky_mensual, pesos, meses, rebalanceo_mensual, malla):
+    rng = np.random.default_rng(semilla)
+    n_activos = len(pesos)
+    choques = rng.standard_normal((tam_lote, meses, n_activos), dtype=np.float32)
+    rendimientos = choques @ cholesky_mensual.T.astype(np.float32) + media_mensual.astype(np.float32)
+    crecimiento = np.maximum(1 + rendimientos, 0)
+
+    valores = np.empty((tam_lote, meses + 1), dtype=np.float32)
+    valores[:, 0] = 1
+    if rebalanceo_mensual:
+        # La cartera vuelve a los pesos objetivo cada mes
+        np.cumprod(crecimiento @ pesos.astype(np.float32), axis=1, out=valores[:, 1:])
+    else:
+        # Comprar y mantener: cada activo crece por separado desde su peso inicial
+        np.cumprod(crecimiento, axis=1, out=crecimiento)
+        valores[:, 1:] = crecimiento @ pesos.astype(np.float32)
+    return valores[:, malla]
+
+
+# Función para calcular el VaR y el CVaR (pérdidas esperadas en $) a partir de valores simulados
+def var_cvar(valores, valor_inicial, nivel=0.95):
+    perdidas = valor_inicial - np.asarray(valores, dtype=float)
+    var = np.quantile(perdidas, nivel)
+    cvar = perdidas[perdidas >= var].mean()
+    return var, cvar
+
+
+# Función principal de la simulación.
+# Devuelve un diccionario con los percentiles en los meses de la malla, los valores
+# finales y una tabla de VaR/CVaR a 1 año y al final del horizonte.
+# `pool` es opcional: un ProcessPoolExecutor de larga vida para repartir los lotes.
+def simular_cartera(
+    rendimiento_anual,
+    matriz_covarianza,
+    pesos,
+    anios=10,
+    n_trayectorias=10_000,
+    valor_inicial=10_000,
+    nivel=0.95,
+    semilla=None,
+    pool=None,
+    rebalanceo_mensual=False,
+):
+    pesos = np.asarray(pesos, dtype=float)
+    meses = int(anios * MESES_POR_ANIO)
+    media_mensual = np.asarray(rendimiento_anual, dtype=float) / MESES_POR_ANIO
+    cholesky_mensual = factor_cholesky(np.asarray(matriz_covarianza, dtype=float) / MESES_POR_ANIO)
+
+    # Tamaño de lote limitado por memoria; cada lote recibe su propia semilla derivada,
+    # así el resultado no depende del número de procesos
+    tam_lote = max(1, min(n_trayectorias, MAX_ELEMENTOS_LOTE // max(1, meses * len(pesos))))
+    tamanos = [tam_lote] * (n_trayectorias // tam_lote)
+    if n_trayectorias % tam_lote:
+        tamanos.append(n_trayectorias % tam_lote)
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    malla = malla_meses(meses)
+    argumentos = [
+        (s, t, media_mensual, cholesky_mensual, pesos, meses, rebalanceo_mensual, malla)
+        for s, t in zip(semillas, tamanos)
+    ]
+
+    # Se guarda por mes de la malla (puntos x trayectorias) para que los percentiles
+    # recorran memoria contigua
+    valores = np.empty((len(malla), n_trayectorias), dtype=np.float32)
+    inicios = np.concatenate([[0], np.cumsum(tamanos)])
+    if pool is not None and len(argumentos) > 1:
+        lotes = pool.map(_simular_lote, *zip(*argumentos))
+    else:
+        lotes = (_simular_lote(*a) for a in argumentos)
+    for inicio, lote in zip(inicios, lotes):
+        valores[:, inicio:inicio + len(lote)] = lote.T
+    valores *= valor_inicial
+    fila = {mes: i for i, mes in enumerate(malla)}
+
+    percentiles = pd.DataFrame(
+        np.percentile(valores, PERCENTILES, axis=1).T,
+        index=pd.Index(malla, name="Mes"),
+        columns=[f"P{p}" for p in PERCENTILES],
+    )
+
+    horizontes = {"1 año": min(MESES_POR_ANIO, meses)}
+    if meses > MESES_POR_ANIO:
+        horizontes[f"{anios} años"] = meses
+    riesgo = {}
+    for etiqueta, mes in horizontes.items():
+        var, cvar = var_cvar(valores[fila[mes]], valor_inicial, nivel)
+        riesgo[etiqueta] = {"VaR": var, "CVaR": cvar}
+
+    return {
+        "percentiles": percentiles,
+        "valores_finales": valores[-1],
+        "riesgo": pd.DataFrame(riesgo).T,
+        "nivel": nivel,
+    }
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+# Optimizador media-varianza para carteras sin ventas en corto (pesos >= 0 que suman 1).
+# Se resuelven a la vez muchos problemas
+#   min  (a/2) w'Σw - b μ'w   sujeto a  w en el simplex
+# con un gradiente proyectado acelerado (FISTA) vectorizado sobre todas las filas.
+# Cada fila corresponde a un nivel de aversión al riesgo; la fila con b = 0 es la
+# cartera de mínima varianza.
+
+ITERACIONES_MAXIMAS = 5000
+TOLERANCIA = 1e-10
+NIVELES_AVERSION = 200
+
+
+# Función para proyectar cada fila de una matriz sobre el simplex {w >= 0, sum(w) = 1}
+def proyectar_simplex(matriz):
+    ordenada = -np.sort(-matriz, axis=1)
+    acumulada = np.cumsum(ordenada, axis=1) - 1
+    indices = np.arange(1, matriz.shape[1] + 1)
+    condicion = ordenada - acumulada / indices > 0
+    rho = matriz.shape[1] - 1 - np.argmax(condicion[:, ::-1], axis=1)
+    theta = acumulada[np.arange(len(matriz)), rho] / (rho + 1)
+    return np.maximum(matriz - theta[:, None], 0)
+
+
+# Función para resolver en lote los problemas cuadráticos sobre el simplex
+def resolver_lote(rendimientos, covarianza, a, b):
+    n = len(rendimientos)
+    a = np.asarray(a, dtype=float)[:, None]
+    b = np.asarray(b, dtype=float)[:, None]
+    paso = 1 / (a * max(np.linalg.eigvalsh(covarianza)[-1], 1e-18))
+
+    pesos = np.full((len(a), n), 1 / n)
+    auxiliar = pesos.copy()
+    t = 1.0
+    for _ in range(ITERACIONES_MAXIMAS):
+        gradiente = a * (auxiliar @ covarianza) - b * rendimientos
+        nuevos = proyectar_simplex(auxiliar - paso * gradiente)
+        t_nuevo = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        auxiliar = nuevos + ((t - 1) / t_nuevo) * (nuevos - pesos)
+        cambio = np.abs(nuevos - pesos).max()
+        pesos, t = nuevos, t_nuevo
+        if cambio < TOLERANCIA:
+            break
+    return pesos
+
+
+# Función para calcular rendimiento y volatilidad de varias carteras (una por fila)
+def estadisticas_carteras(pesos, rendimientos, covarianza):
+    pesos = np.atleast_2d(pesos)
+    rendimiento = pesos @ rendimientos
+    volatilidad = np.sqrt(np.maximum(np.einsum("ij,jk,ik->i", pesos, covarianza, pesos), 0))
+    return rendimiento, volatilidad
+
+
+# Función para calcular la frontera eficiente, la cartera de máximo Sharpe y la de mínima varianza.
+# rendimiento_anual y matriz_covarianza son los anualizados de recomendaciones_etfs.
+def frontera_eficiente(rendimiento_anual, matriz_covarianza, n_puntos=50, tasa_libre_riesgo=0.0):
+    tickers = list(rendimiento_anual.index)
+    rendimientos = rendimiento_anual.to_numpy(dtype=float)
+    covarianza = matriz_covarianza.loc[tickers, tickers].to_numpy(dtype=float)
+
+    # Barrido de aversión al riesgo, escalado a los datos, más la cartera de mínima varianza
+    escala = (np.ptp(rendimientos) + 1e-12) / max(np.mean(np.diag(covarianza)), 1e-18)
+    aversion = escala * np.logspace(-3, 4, NIVELES_AVERSION)
+    pesos = resolver_lote(
+        rendimientos, covarianza, np.append(aversion, 1.0), np.append(np.ones(NIVELES_AVERSION), 0.0)
+    )
+    # Cartera de máximo rendimiento: todo en el activo de mayor rendimiento
+    pesos = np.vstack([pesos, np.eye(len(tickers))[np.argmax(rendimientos)]])
+    rendimiento, _ = estadisticas_carteras(pesos, rendimientos, covarianza)
+
+    # Los pesos de la frontera son lineales por tramos en el rendimiento objetivo,
+    # así que se interpolan entre las soluciones vecinas para cada objetivo
+    orden = np.argsort(rendimiento, kind="stable")
+    rendimiento, pesos = rendimiento[orden], pesos[orden]
+    minimo = rendimiento[np.argmin(estadisticas_carteras(pesos, rendimientos, covarianza)[1])]
+    validos = rendimiento >= minimo
+    rendimiento, pesos = rendimiento[validos], pesos[validos]
+    objetivos = np.linspace(rendimiento[0], rendimiento[-1], n_puntos)
+    pesos_frontera = np.column_stack([np.interp(objetivos, rendimiento, pesos[:, i]) for i in range(len(tickers))])
+    pesos_frontera /= pesos_frontera.sum(axis=1, keepdims=True)
+    rendimiento_frontera, volatilidad_frontera = estadisticas_carteras(pesos_frontera, rendimientos, covarianza)
+
+    frontera = pd.DataFrame(pesos_frontera, columns=tickers)
+    frontera.insert(0, "Volatilidad", volatilidad_frontera)
+    frontera.insert(0, "Rendimiento", rendimiento_frontera)
+
+    sharpe = (rendimiento_frontera - tasa_libre_riesgo) / np.where(volatilidad_frontera > 0, volatilidad_frontera, np.nan)
+    fila_sharpe = int(np.nanargmax(sharpe)) if np.isfinite(sharpe).any() else len(frontera) - 1
+    return {
+        "frontera": frontera,
+        "max_sharpe": frontera.iloc[fila_sharpe],
+        "min_varianza": frontera.iloc[0],
+    }
+
+
+# Función para convertir pesos (0 a 1) a porcentajes enteros que suman exactamente 100
+def redondear_pesos(pesos, total=100):
+    valores = np.asarray(pesos, dtype=float) * total
+    enteros = np.floor(valores).astype(int)
+    faltante = total - enteros.sum()
+    enteros[np.argsort(-(valores - enteros), kind="stable")[:faltante]] += 1
+    return enteros.tolist()
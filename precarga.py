@@ -0,0 +1,75 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Precarga en segundo plano de los precios de los ETFs candidatos.
+# Mientras el cliente llena el registro y el cuestionario, un grupo acotado de hilos
+# descarga los precios por lotes en el almacén local, con reintentos y espera
+# exponencial. La página de recomendaciones consulta qué tickers siguen pendientes
+# para mostrar resultados parciales en lugar de bloquearse.
+
+logger = logging.getLogger(__name__)
+
+
+class Precargador:
+    def __init__(self, almacen, max_hilos=4, tam_lote=10, reintentos=3, espera=1.0):
+        self.almacen = almacen
+        self.tam_lote = tam_lote
+        self.reintentos = reintentos
+        self.espera = espera
+        self._pool = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="precarga")
+        self._futuros = {}
+        self._fallidos = set()
+        self._candado = threading.Lock()
+
+    # Descargar un lote con reintentos; el almacén solo pide los rangos que faltan.
+    # La fuente suele reportar un fallo como columnas vacías y no como excepción, así que
+    # después de cada intento se revisa qué tickers siguen sin cubrir y solo esos se reintentan.
+    def _descargar(self, lote, inicio, fin):
+        for intento in range(self.reintentos):
+            error = "sin datos"
+            try:
+                self.almacen.actualizar(lote, inicio, fin)
+            except Exception as e:
+                error = e
+            lote = [ticker for ticker in lote if not self.almacen.cubre(ticker, inicio, fin)]
+            if not lote:
+                return
+            if intento < self.reintentos - 1:
+                time.sleep(self.espera * 2 ** intento)
+        logger.warning("No se pudieron precargar %s: %s", ", ".join(lote), error)
+        with self._candado:
+            self._fallidos.update(lote)
+
+    # Empezar a descargar los tickers que no estén ya en el almacén ni en curso
+    def iniciar(self, tickers, inicio, fin):
+        with self._candado:
+            nuevos = [
+                ticker for ticker in dict.fromkeys(tickers)
+                if not self._en_curso(ticker) and not self.almacen.cubre(ticker, inicio, fin)
+            ]
+            for i in range(0, len(nuevos), self.tam_lote):
+                lote = nuevos[i:i + self.tam_lote]
+                self._fallidos.difference_update(lote)
+                futuro = self._pool.submit(self._descargar, lote, inicio, fin)
+                for ticker in lote:
+                    self._futuros[ticker] = futuro
+        return nuevos
+
+    def _en_curso(self, ticker):
+        futuro = self._futuros.get(ticker)
+        return futuro is not None and not futuro.done()
+
+    # Tickers cuya descarga sigue en curso
+    def pendientes(self, tickers):
+        with self._candado:
+            return [ticker for ticker in tickers if self._en_curso(ticker)]
+
+    # Tickers que quedaron sin datos después de todos los reintentos
+    def fallidos(self, tickers):
+        with self._candado:
+            return [ticker for ticker in tickers if ticker in self._fallidos]
+
+    def cerrar(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,404 @@
+import argparse
+import base64
+import html
+import io
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from matplotlib.image import imread
+
+from almacen_precios import AlmacenPrecios
+from analitica_cartera import AnaliticaCartera
+from cuestionario import COLUMNAS_PREGUNTAS, OPCIONES, puntuar_tabla
+from graficas import reducir_tabla
+from interes_compuesto import proyectar_patrimonio
+from riesgo import TICKER_MERCADO, metricas_riesgo
+from universo_etfs import cargar_universo
+
+# Generación en lote de reportes de clientes, sin la interfaz de Streamlit.
+# Lee un CSV con un cliente por fila (datos de registro, respuestas p1..p67 y,
+# opcionalmente, asignaciones y plan de aportaciones), califica todos los perfiles
+# en una pasada, carga una sola vez el panel de precios de todos los ETFs y reparte
+# los clientes entre varios procesos. Cada proceso abre el panel con mmap (sin
+# copiarlo) y escribe un reporte HTML por cliente, y opcionalmente un PDF.
+#
+#   python reportes.py clientes.csv -o reportes/ --procesos 8 --pdf
+#
+# Columnas del CSV:
+#   nombre, p1..p67                     obligatorias
+#   telefono, email, ciudad, edad       opcionales
+#   asignaciones                        "QQQ=50;SPY=30;EEM=20"; vacía = cartera sugerida del perfil
+#   aportacion_inicial, aportacion_periodica, horizonte_anios   opcionales
+
+APORTACION_INICIAL = 1000
+APORTACION_PERIODICA = 100
+HORIZONTE_ANIOS = 5
+ANIOS_HISTORIA = 10
+
+
+# Función para leer y calificar el archivo de clientes.
+# Devuelve los clientes válidos (calificados en una sola pasada) y las filas del
+# resumen de los clientes con respuestas inválidas, que no detienen el lote.
+def leer_clientes(ruta):
+    tabla = pd.read_csv(ruta, dtype={"asignaciones": str})
+    faltantes = [columna for columna in ["nombre"] + COLUMNAS_PREGUNTAS if columna not in tabla.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas: {', '.join(faltantes)}")
+    tabla.insert(0, "numero", np.arange(1, len(tabla) + 1))
+
+    respuestas = tabla[COLUMNAS_PREGUNTAS].to_numpy()
+    invalidas = ~np.isin(respuestas, OPCIONES)
+    filas_invalidas = invalidas.any(axis=1)
+    errores = []
+    for fila in np.flatnonzero(filas_invalidas):
+        columna = invalidas[fila].argmax()
+        errores.append({
+            "numero": tabla["numero"].iat[fila],
+            "nombre": tabla["nombre"].iat[fila],
+            "error": f"Respuesta inválida en la pregunta {columna + 1}: {respuestas[fila, columna]}",
+        })
+
+    clientes = puntuar_tabla(tabla[~filas_invalidas])
+    if "asignaciones" not in clientes.columns:
+        clientes["asignaciones"] = ""
+    valores_predeterminados = {
+        "aportacion_inicial": APORTACION_INICIAL,
+        "aportacion_periodica": APORTACION_PERIODICA,
+        "horizonte_anios": HORIZONTE_ANIOS,
+    }
+    for columna, valor in valores_predeterminados.items():
+        clientes[columna] = clientes[columna].fillna(valor) if columna in clientes.columns else valor
+    clientes["asignaciones"] = clientes["asignaciones"].fillna("")
+    return clientes, errores
+
+
+# Función para convertir "QQQ=50;SPY=30;EEM=20" en (tickers, porcentajes).
+# Si el texto está vacío se usa la cartera sugerida para el perfil de riesgo.
+def parsear_asignaciones(texto, nivel_riesgo, universo):
+    if not texto.strip():
+        recomendacion = universo.recomendaciones[nivel_riesgo]
+        return tuple(recomendacion["ETFs"]), tuple(recomendacion["Distribución"])
+    tickers, porcentajes = [], []
+    for parte in texto.split(";"):
+        if not parte.strip():
+            continue
+        ticker, _, porcentaje = parte.partition("=")
+        ticker = ticker.strip().upper()
+        if ticker not in universo:
+            raise ValueError(f"ETF desconocido en las asignaciones: {ticker}")
+        tickers.append(ticker)
+        porcentajes.append(float(porcentaje))
+    if not tickers or abs(sum(porcentajes) - 100) > 1e-6:
+        raise ValueError(f"Las asignaciones deben sumar 100%: {texto}")
+    return tuple(tickers), tuple(porcentajes)
+
+
+# Panel de precios compartido: una matriz (días x tickers) en .npy que los procesos
+# abren con mmap, más las fechas (días desde 1970) y los nombres de las columnas
+def guardar_panel(precios, directorio):
+    np.save(os.path.join(directorio, "precios.npy"), precios.to_numpy(dtype=float))
+    np.save(os.path.join(directorio, "fechas.npy"), precios.index.to_numpy().astype("datetime64[D]").astype(np.int64))
+    with open(os.path.join(directorio, "tickers.json"), "w", encoding="utf-8") as f:
+        json.dump(list(precios.columns), f)
+
+
+def abrir_panel(directorio):
+    matriz = np.load(os.path.join(directorio, "precios.npy"), mmap_mode="r")
+    fechas = np.load(os.path.join(directorio, "fechas.npy"))
+    with open(os.path.join(directorio, "tickers.json"), encoding="utf-8") as f:
+        tickers = json.load(f)
+    indice = pd.DatetimeIndex(fechas.astype("datetime64[D]"), name="Date")
+    return matriz, indice, {ticker: i for i, ticker in enumerate(tickers)}
+
+
+# Estado de cada proceso trabajador (se llena en _iniciar_trabajador)
+_trabajador = {}
+
+
+def _iniciar_trabajador(directorio_panel, salida, pdf):
+    _trabajador["panel"] = abrir_panel(directorio_panel)
+    _trabajador["salida"] = salida
+    _trabajador["pdf"] = pdf
+    _analitica.cache_clear()
+    _resultados_cartera.cache_clear()
+    _proyeccion.cache_clear()
+
+
+# Analítica por conjunto de ETFs; muchos clientes comparten la misma cartera sugerida
+@lru_cache(maxsize=64)
+def _analitica(tickers):
+    matriz, indice, posiciones = _trabajador["panel"]
+    columnas = [posiciones[ticker] for ticker in tickers]
+    precios = pd.DataFrame(matriz[:, columnas], index=indice, columns=list(tickers))
+    if precios.dropna().empty:
+        raise ValueError(f"No hay precios en fechas comunes para {', '.join(tickers)}")
+    return AnaliticaCartera(precios)
+
+
+def _mercado():
+    matriz, indice, posiciones = _trabajador["panel"]
+    return pd.Series(matriz[:, posiciones[TICKER_MERCADO]], index=indice).pct_change()
+
+
+def png_base64(figura):
+    buffer = io.BytesIO()
+    figura.savefig(buffer, format="png", dpi=100)
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+# Las figuras se crean sin pyplot (no quedan registradas y no hay que cerrarlas)
+def grafica_historica(analitica, curva):
+    figura = Figure(figsize=(9, 4), layout="tight")
+    ax = figura.subplots()
+    tabla = reducir_tabla(analitica.precios_indice.join(curva.rename("Cartera") * 1000))
+    for ticker in analitica.tickers:
+        ax.plot(tabla.index, tabla[ticker], linewidth=0.8, alpha=0.7, label=ticker)
+    ax.plot(tabla.index, tabla["Cartera"], color="black", linewidth=1.6, label="Cartera")
+    ax.set_ylabel("Valor (base 1000)")
+    ax.legend(loc="upper left")
+    ax.grid(alpha=0.3)
+    return figura
+
+
+def grafica_proyeccion(patrimonio_inversion, patrimonio_ahorro):
+    figura = Figure(figsize=(9, 4), layout="tight")
+    ax = figura.subplots()
+    meses = np.arange(len(patrimonio_inversion))
+    ax.plot(meses, patrimonio_inversion, color="#4CAF50", label="Inversión con Rendimiento")
+    ax.plot(meses, patrimonio_ahorro, color="#FF5722", label="Ahorro sin Rendimiento")
+    ax.set_xlabel("Meses")
+    ax.set_ylabel("Valor ($)")
+    ax.legend(loc="upper left")
+    ax.grid(alpha=0.3)
+    return figura
+
+
+PLANTILLA = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>Reporte de inversión - {nombre}</title>
+<style>
+body {{ font-family: sans-serif; max-width: 960px; margin: 2em auto; color: #222; }}
+table {{ border-collapse: collapse; margin-bottom: 1em; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 8px; text-align: right; }}
+.nota {{ color: #777; font-size: 0.85em; }}
+</style>
+</head>
+<body>
+<h1>Simulador de Inversiones - Allianz Patrimonial</h1>
+<h2>{nombre}</h2>
+<p>Perfil de riesgo: <b>{nivel_riesgo}</b> (puntaje {puntaje})</p>
+<p>{explicacion}</p>
+<h3>Cartera</h3>
+{tabla_cartera}
+<p>Rendimiento esperado: {rendimiento:.2f}% &mdash; Volatilidad de la cartera: {volatilidad:.2f}%</p>
+<h3>Riesgo</h3>
+{tabla_riesgo}
+<h3>Desempeño histórico ({inicio} a {fin})</h3>
+<img src="data:image/png;base64,{grafica_historica}" alt="Desempeño histórico">
+<h3>Crecimiento de tu inversión a {horizonte} años</h3>
+<img src="data:image/png;base64,{grafica_proyeccion}" alt="Proyección de interés compuesto">
+<p>Aportación inicial: ${aportacion_inicial:,.2f} &mdash; Aportación mensual: ${aportacion_periodica:,.2f}</p>
+<p>Valor final estimado de la inversión: <b>${valor_final:,.2f}</b><br>
+Valor acumulado sin rendimiento: ${valor_ahorro:,.2f}</p>
+<p class="nota">Generado el {fecha}. Los rendimientos pasados no garantizan rendimientos futuros.</p>
+</body>
+</html>
+"""
+
+
+# Resultados por cartera (tickers y porcentajes). Los clientes con la misma cartera
+# comparten estadísticas, tablas y gráfica, así que solo se calculan una vez por proceso.
+@lru_cache(maxsize=64)
+def _resultados_cartera(tickers, porcentajes):
+    analitica = _analitica(tickers)
+    pesos = np.asarray(porcentajes) / 100
+    rendimiento, volatilidad = analitica.estadisticas(pesos)
+    curva = analitica.curva(pesos)
+    riesgo = metricas_riesgo(curva.pct_change().dropna(), _mercado())
+    tabla_cartera = pd.DataFrame(
+        {"Porcentaje (%)": porcentajes, "Rendimiento anual (%)": analitica.rendimiento_anual.to_numpy() * 100},
+        index=pd.Index(tickers, name="ETF"),
+    )
+    figura = grafica_historica(analitica, curva)
+    return {
+        "rendimiento": rendimiento,
+        "volatilidad": volatilidad,
+        "tabla_cartera": tabla_cartera.to_html(float_format="{:.2f}".format),
+        "tabla_riesgo": riesgo.T.to_html(float_format="{:.2f}".format),
+        "inicio": analitica.precios.index[0].date(),
+        "fin": analitica.precios.index[-1].date(),
+        "png": png_base64(figura),
+    }
+
+
+# Proyección de interés compuesto por plan de aportaciones (también compartida entre clientes)
+@lru_cache(maxsize=256)
+def _proyeccion(aportacion_inicial, aportacion_periodica, horizonte, rendimiento):
+    patrimonio_inversion, patrimonio_ahorro = proyectar_patrimonio(
+        aportacion_inicial, aportacion_periodica, horizonte, rendimiento
+    )
+    figura = grafica_proyeccion(patrimonio_inversion, patrimonio_ahorro)
+    return {
+        "valor_final": patrimonio_inversion[-1],
+        "valor_ahorro": patrimonio_ahorro[-1],
+        "png": png_base64(figura),
+    }
+
+
+# Página del PDF: resumen del cliente y las dos gráficas ya generadas como PNG
+# (se insertan como imágenes para no volver a dibujarlas para cada cliente)
+def pagina_pdf(cliente, cartera, proyeccion):
+    figura = Figure(figsize=(8.27, 11.69))  # A4
+    lineas = [
+        f"Perfil de riesgo: {cliente['nivel_riesgo']} (puntaje {cliente['puntaje']})",
+        f"Rendimiento esperado: {cartera['rendimiento']:.2f}% - Volatilidad: {cartera['volatilidad']:.2f}%",
+        f"Valor final estimado a {int(cliente['horizonte_anios'])} años: ${proyeccion['valor_final']:,.2f}",
+    ]
+    figura.text(0.06, 0.96, str(cliente["nombre"]), fontsize=16, weight="bold", va="top")
+    figura.text(0.06, 0.92, "\n".join(lineas), fontsize=10, va="top", linespacing=1.8)
+    for posicion, png in (((0.04, 0.42, 0.92, 0.38), cartera["png"]), ((0.04, 0.03, 0.92, 0.38), proyeccion["png"])):
+        ax = figura.add_axes(posicion)
+        ax.imshow(imread(io.BytesIO(base64.b64decode(png)), format="png"))
+        ax.axis("off")
+    return figura
+
+
+def _nombre_archivo(numero, nombre):
+    return f"{numero:05d}_{re.sub(r'[^A-Za-z0-9]+', '_', str(nombre)).strip('_')[:40] or 'cliente'}"
+
+
+# Función para generar el reporte de un cliente; devuelve una fila del resumen.
+# Los errores de un cliente se anotan en el resumen sin detener el lote.
+def generar_reporte(cliente):
+    resumen = {"numero": cliente["numero"], "nombre": cliente["nombre"], "nivel_riesgo": cliente["nivel_riesgo"]}
+    try:
+        cartera = _resultados_cartera(cliente["tickers"], cliente["porcentajes"])
+        horizonte = int(cliente["horizonte_anios"])
+        proyeccion = _proyeccion(
+            float(cliente["aportacion_inicial"]), float(cliente["aportacion_periodica"]), horizonte, cartera["rendimiento"]
+        )
+        contenido = PLANTILLA.format(
+            nombre=html.escape(str(cliente["nombre"])),
+            nivel_riesgo=html.escape(cliente["nivel_riesgo"]),
+            puntaje=cliente["puntaje"],
+            explicacion=html.escape(cliente["explicacion"]),
+            tabla_cartera=cartera["tabla_cartera"],
+            rendimiento=cartera["rendimiento"],
+            volatilidad=cartera["volatilidad"],
+            tabla_riesgo=cartera["tabla_riesgo"],
+            inicio=cartera["inicio"],
+            fin=cartera["fin"],
+            grafica_historica=cartera["png"],
+            grafica_proyeccion=proyeccion["png"],
+            horizonte=horizonte,
+            aportacion_inicial=cliente["aportacion_inicial"],
+            aportacion_periodica=cliente["aportacion_periodica"],
+            valor_final=proyeccion["valor_final"],
+            valor_ahorro=proyeccion["valor_ahorro"],
+            fecha=datetime.now().strftime("%Y-%m-%d %H:%M"),
+        )
+
+        base = os.path.join(_trabajador["salida"], _nombre_archivo(cliente["numero"], cliente["nombre"]))
+        with open(base + ".html", "w", encoding="utf-8") as f:
+            f.write(contenido)
+        if _trabajador["pdf"]:
+            with PdfPages(base + ".pdf") as pdf:
+                pdf.savefig(pagina_pdf(cliente, cartera, proyeccion))
+
+        resumen.update({
+            "rendimiento_esperado": cartera["rendimiento"],
+            "volatilidad": cartera["volatilidad"],
+            "valor_final": proyeccion["valor_final"],
+            "archivo": base + ".html",
+            "error": "",
+        })
+    except Exception as e:
+        resumen["error"] = f"{type(e).__name__}: {e}"
+    return resumen
+
+
+# Función para generar los reportes de todos los clientes de un archivo CSV
+def generar_reportes(ruta_clientes, salida, procesos=None, pdf=False, fin=None, almacen=None):
+    universo = cargar_universo()
+    clientes, resumenes = leer_clientes(ruta_clientes)
+    os.makedirs(salida, exist_ok=True)
+
+    # Cartera de cada cliente; los errores de captura se reportan en el resumen
+    trabajos = []
+    for fila in clientes.to_dict("records"):
+        try:
+            tickers, porcentajes = parsear_asignaciones(fila["asignaciones"], fila["nivel_riesgo"], universo)
+        except ValueError as e:
+            resumenes.append({"numero": fila["numero"], "nombre": fila["nombre"], "nivel_riesgo": fila["nivel_riesgo"], "error": str(e)})
+            continue
+        fila.update({
+            "tickers": tickers,
+            "porcentajes": porcentajes,
+            "explicacion": universo.explicaciones.get(fila["nivel_riesgo"], ""),
+        })
+        trabajos.append(fila)
+
+    # Un solo panel de precios para todos los ETFs usados en el lote
+    fin = fin or datetime.now().date()
+    inicio = fin - timedelta(days=round(365.25 * ANIOS_HISTORIA))
+    tickers = sorted({ticker for trabajo in trabajos for ticker in trabajo["tickers"]} | {TICKER_MERCADO})
+    precios = (almacen or AlmacenPrecios()).precios(tickers, inicio, fin)
+
+    # Los clientes con algún ETF sin precios en la ventana no se procesan
+    sin_datos = set(precios.columns[precios.isna().all()])
+    if sin_datos:
+        con_datos = []
+        for trabajo in trabajos:
+            faltantes = [ticker for ticker in trabajo["tickers"] if ticker in sin_datos]
+            if faltantes:
+                resumenes.append({
+                    "numero": trabajo["numero"],
+                    "nombre": trabajo["nombre"],
+                    "nivel_riesgo": trabajo["nivel_riesgo"],
+                    "error": f"Sin datos de precios para: {', '.join(faltantes)}",
+                })
+            else:
+                con_datos.append(trabajo)
+        trabajos = con_datos
+
+    procesos = procesos or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory(prefix="panel_") as directorio_panel:
+        guardar_panel(precios, directorio_panel)
+        argumentos = (directorio_panel, salida, pdf)
+        if procesos > 1 and len(trabajos) > 1:
+            bloque = max(1, len(trabajos) // (procesos * 4))
+            with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador, initargs=argumentos) as pool:
+                resumenes.extend(pool.map(generar_reporte, trabajos, chunksize=bloque))
+        else:
+            _iniciar_trabajador(*argumentos)
+            resumenes.extend(generar_reporte(trabajo) for trabajo in trabajos)
+
+    resumen = pd.DataFrame(resumenes).sort_values("numero").reset_index(drop=True)
+    resumen.to_csv(os.path.join(salida, "resumen.csv"), index=False)
+    return resumen
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera en lote los reportes de inversión de los clientes.")
+    parser.add_argument("entrada", help="CSV de clientes (nombre, p1..p67 y columnas opcionales)")
+    parser.add_argument("-o", "--salida", default="reportes", help="carpeta de salida (por defecto: reportes)")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos trabajadores (por defecto: núcleos)")
+    parser.add_argument("--pdf", action="store_true", help="generar también un PDF por cliente")
+    parser.add_argument("--fin", type=lambda texto: datetime.strptime(texto, "%Y-%m-%d").date(),
+                        help="fecha final del histórico de precios (AAAA-MM-DD, por defecto hoy)")
+    args = parser.parse_args()
+
+    resumen = generar_reportes(args.entrada, args.salida, procesos=args.procesos, pdf=args.pdf, fin=args.fin)
+    errores = (resumen["error"].fillna("") != "").sum()
+    print(f"{len(resumen) - errores} reportes generados en {args.salida}; {errores} con errores (ver resumen.csv).")
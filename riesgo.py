@@ -0,0 +1,106 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from analitica_cartera import DIAS_HABILES_ANIO
+
+# Métricas de riesgo sobre rendimientos diarios (una columna por ETF o cartera).
+# Todo se calcula con operaciones acumuladas de NumPy sobre la matriz completa,
+# sin recorrer los días en Python: volatilidad móvil con sumas acumuladas, caídas
+# con el máximo acumulado y beta con la covarianza contra el mercado (SPY).
+
+VENTANA_VOLATILIDAD = 63  # un trimestre de días hábiles
+TICKER_MERCADO = "SPY"
+
+
+def _como_tabla(rendimientos):
+    if isinstance(rendimientos, pd.Series):
+        return rendimientos.to_frame()
+    return rendimientos
+
+
+# Función para calcular la volatilidad móvil anualizada (%) con sumas acumuladas
+def volatilidad_movil(rendimientos, ventana=VENTANA_VOLATILIDAD):
+    tabla = _como_tabla(rendimientos)
+    matriz = tabla.to_numpy(dtype=float)
+    if len(matriz) < ventana:
+        return pd.DataFrame(index=tabla.index[:0], columns=tabla.columns, dtype=float)
+
+    ceros = np.zeros((1, matriz.shape[1]))
+    suma = np.cumsum(matriz, axis=0)
+    suma_cuadrados = np.cumsum(matriz ** 2, axis=0)
+    suma = suma[ventana - 1:] - np.vstack([ceros, suma[:-ventana]])
+    suma_cuadrados = suma_cuadrados[ventana - 1:] - np.vstack([ceros, suma_cuadrados[:-ventana]])
+    varianza = (suma_cuadrados - suma ** 2 / ventana) / (ventana - 1)
+    volatilidad = np.sqrt(np.maximum(varianza, 0) * DIAS_HABILES_ANIO) * 100
+    return pd.DataFrame(volatilidad, index=tabla.index[ventana - 1:], columns=tabla.columns)
+
+
+# Función para calcular la máxima caída (%) y la mayor duración bajo el máximo previo (días hábiles)
+def caidas(rendimientos):
+    tabla = _como_tabla(rendimientos)
+    valores = np.cumprod(1 + tabla.to_numpy(dtype=float), axis=0)
+    valores = np.vstack([np.ones((1, valores.shape[1])), valores])
+    pico = np.maximum.accumulate(valores, axis=0)
+    caida = valores / pico - 1
+
+    # Días transcurridos desde la última vez que se estuvo en el máximo
+    posiciones = np.arange(len(valores))[:, None]
+    ultimo_pico = np.maximum.accumulate(np.where(caida >= 0, posiciones, 0), axis=0)
+    return pd.DataFrame(
+        {
+            "Máxima caída (%)": caida.min(axis=0) * 100,
+            "Duración de la caída (días)": (posiciones - ultimo_pico).max(axis=0),
+        },
+        index=tabla.columns,
+    )
+
+
+# Función para calcular todas las métricas de riesgo de cada columna en una pasada
+def metricas_riesgo(rendimientos, mercado=None, tasa_libre_riesgo=0.0, nivel=0.95):
+    tabla = _como_tabla(rendimientos)
+    matriz = tabla.to_numpy(dtype=float)
+    n_dias = len(matriz)
+
+    media = matriz.mean(axis=0)
+    desviacion = matriz.std(axis=0, ddof=1)
+    rendimiento_anual = media * DIAS_HABILES_ANIO
+    volatilidad_anual = desviacion * np.sqrt(DIAS_HABILES_ANIO)
+
+    # Desviación a la baja: solo los días por debajo de la tasa libre de riesgo diaria
+    exceso = matriz - tasa_libre_riesgo / DIAS_HABILES_ANIO
+    desviacion_baja = np.sqrt((np.minimum(exceso, 0) ** 2).mean(axis=0) * DIAS_HABILES_ANIO)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = (rendimiento_anual - tasa_libre_riesgo) / volatilidad_anual
+        sortino = (rendimiento_anual - tasa_libre_riesgo) / desviacion_baja
+
+    # VaR diario: cuantil histórico y aproximación normal
+    var_historico = -np.quantile(matriz, 1 - nivel, axis=0)
+    var_parametrico = -(media + desviacion * NormalDist().inv_cdf(1 - nivel))
+
+    resultado = pd.DataFrame(
+        {
+            "Rendimiento anual (%)": rendimiento_anual * 100,
+            "Volatilidad anual (%)": volatilidad_anual * 100,
+            "Sharpe": sharpe,
+            "Sortino": sortino,
+            f"VaR histórico {nivel:.0%} (%)": var_historico * 100,
+            f"VaR paramétrico {nivel:.0%} (%)": var_parametrico * 100,
+        },
+        index=tabla.columns,
+    )
+    resultado = resultado.join(caidas(tabla))
+
+    # Beta contra el mercado, solo con los días en que ambos tienen dato
+    if mercado is not None and n_dias > 1:
+        rm = mercado.reindex(tabla.index).to_numpy(dtype=float)
+        comunes = np.isfinite(rm)
+        if comunes.sum() < 2:
+            resultado["Beta"] = np.nan
+            return resultado
+        rm = rm[comunes] - rm[comunes].mean()
+        ri = matriz[comunes] - matriz[comunes].mean(axis=0)
+        resultado["Beta"] = (ri * rm[:, None]).sum(axis=0) / (rm ** 2).sum()
+    return resultado
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import secrets
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# Instantáneas del recorrido del cliente (registro, cuestionario, recomendaciones y
+# calculadora) guardadas en SQLite bajo un token de sesión. Si el navegador se
+# reconecta o el servidor se reinicia, la sesión se restaura con el token y el
+# cliente no tiene que volver a contestar el cuestionario.
+# Cada valor se guarda en su propia fila, así que solo se escriben los que cambiaron:
+# los arreglos de NumPy como bytes crudos (las 67 respuestas ocupan 67 bytes) y lo
+# demás como JSON compacto. Para saber qué cambió, la sesión solo conserva una huella
+# de 16 bytes de cada valor guardado, no una segunda copia del valor.
+
+RUTA_PREDETERMINADA = os.environ.get("SIMULADOR_SESIONES_DB", os.path.join(".cache", "sesiones.sqlite"))
+DIAS_INACTIVIDAD = float(os.environ.get("SIMULADOR_SESIONES_DIAS", 30))
+
+CLAVES_SESION = (
+    "current_page",
+    "user_data",
+    "seccion_actual",
+    "respuestas",
+    "nivel_riesgo",
+    "asignaciones",
+    "expected_return",
+    "plan_aportaciones",
+)
+
+
+def nuevo_token():
+    return secrets.token_urlsafe(16)
+
+
+def _a_json(valor):
+    if isinstance(valor, np.generic):
+        return valor.item()
+    raise TypeError(f"No se puede guardar un valor de tipo {type(valor).__name__} en la sesión")
+
+
+# Función para codificar un valor como (tipo, bytes)
+def codificar(valor):
+    if isinstance(valor, np.ndarray):
+        return valor.dtype.str, valor.tobytes()
+    return "json", json.dumps(valor, default=_a_json, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decodificar(tipo, datos):
+    if tipo == "json":
+        return json.loads(datos)
+    return np.frombuffer(datos, dtype=tipo).copy()
+
+
+# Función para tomar la instantánea codificada de las claves persistentes del estado
+def instantanea(estado, claves=CLAVES_SESION):
+    return {clave: codificar(estado[clave]) for clave in claves if clave in estado}
+
+
+# Función para obtener la huella de cada valor de una instantánea codificada
+def huellas(instantanea):
+    return {
+        clave: hashlib.blake2b(tipo.encode("utf-8") + b"\0" + datos, digest_size=16).digest()
+        for clave, (tipo, datos) in instantanea.items()
+    }
+
+
+class AlmacenSesiones:
+    def __init__(self, ruta=RUTA_PREDETERMINADA):
+        self.ruta = ruta
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with self._conexion() as conexion:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("CREATE TABLE IF NOT EXISTS sesiones (token TEXT PRIMARY KEY, actualizado REAL NOT NULL)")
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS valores ("
+                " token TEXT NOT NULL,"
+                " clave TEXT NOT NULL,"
+                " tipo TEXT NOT NULL,"
+                " datos BLOB NOT NULL,"
+                " PRIMARY KEY (token, clave))"
+            )
+
+    @contextmanager
+    def _conexion(self):
+        conexion = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            with conexion:
+                yield conexion
+        finally:
+            conexion.close()
+
+    # Guardar solo los valores cuya huella cambió respecto a las huellas anteriores
+    # (las de huellas(instantanea)). Devuelve el número de valores escritos o eliminados.
+    def guardar(self, token, actual, anterior=None):
+        anterior = anterior or {}
+        nuevas = huellas(actual)
+        cambios = [(token, clave, tipo, datos) for clave, (tipo, datos) in actual.items() if anterior.get(clave) != nuevas[clave]]
+        eliminados = [(token, clave) for clave in anterior if clave not in actual]
+        if not cambios and not eliminados:
+            return 0
+        with self._conexion() as conexion:
+            conexion.executemany("INSERT OR REPLACE INTO valores (token, clave, tipo, datos) VALUES (?, ?, ?, ?)", cambios)
+            conexion.executemany("DELETE FROM valores WHERE token = ? AND clave = ?", eliminados)
+            conexion.execute("INSERT OR REPLACE INTO sesiones (token, actualizado) VALUES (?, ?)", (token, time.time()))
+        return len(cambios) + len(eliminados)
+
+    # Cargar la instantánea codificada de una sesión ({} si no existe)
+    def cargar(self, token):
+        with self._conexion() as conexion:
+            filas = conexion.execute("SELECT clave, tipo, datos FROM valores WHERE token = ?", (token,)).fetchall()
+            if filas:
+                conexion.execute("UPDATE sesiones SET actualizado = ? WHERE token = ?", (time.time(), token))
+        return {clave: (tipo, bytes(datos)) for clave, tipo, datos in filas}
+
+    def eliminar(self, token):
+        with self._conexion() as conexion:
+            conexion.execute("DELETE FROM valores WHERE token = ?", (token,))
+            conexion.execute("DELETE FROM sesiones WHERE token = ?", (token,))
+
+    # Eliminar las sesiones sin actividad en los últimos `dias` días
+    def purgar(self, dias=DIAS_INACTIVIDAD):
+        limite = time.time() - dias * 24 * 3600
+        with self._conexion() as conexion:
+            conexion.execute("DELETE FROM valores WHERE token IN (SELECT token FROM sesiones WHERE actualizado < ?)", (limite,))
+            return conexion.execute("DELETE FROM sesiones WHERE actualizado < ?", (limite,)).rowcount
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from almacen_precios import AlmacenPrecios, FuenteMemoria  # noqa: E402
+
+
+def _precios():
+    indice = pd.bdate_range("2020-01-01", "2020-12-31")
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        100 + rng.normal(0, 1, (len(indice), 2)).cumsum(axis=0), index=indice, columns=["A", "B"]
+    )
+
+
+def test_guarda_y_no_vuelve_a_descargar(tmp_path):
+    fuente = FuenteMemoria(_precios())
+    almacen = AlmacenPrecios(str(tmp_path), fuente=fuente)
+    primera = almacen.precios(["A", "B"], "2020-01-01", "2020-07-01")
+    segunda = almacen.precios(["A", "B"], "2020-02-01", "2020-06-01")
+    assert len(fuente.llamadas) == 1
+    assert primera.notna().all().all()
+    pd.testing.assert_frame_equal(segunda, primera.loc["2020-02-01":"2020-05-31"], check_freq=False)
+
+
+def test_ticker_vacio_en_lote_no_se_marca_cubierto(tmp_path):
+    precios = _precios()
+    fuente = FuenteMemoria(precios.assign(B=np.nan))
+    almacen = AlmacenPrecios(str(tmp_path), fuente=fuente)
+    resultado = almacen.precios(["A", "B"], "2020-01-01", "2020-07-01")
+    assert resultado["B"].isna().all()
+    assert almacen.cubre("A", "2020-01-01", "2020-07-01")
+    assert not almacen.cubre("B", "2020-01-01", "2020-07-01")
+
+    # Cuando la fuente se recupera, B se vuelve a pedir y ya tiene datos
+    fuente.precios = precios
+    resultado = almacen.precios(["A", "B"], "2020-01-01", "2020-07-01")
+    assert fuente.llamadas[-1][0] == ("B",)
+    assert len(fuente.llamadas) == 2
+    assert resultado["B"].notna().all()
+    assert almacen.cubre("B", "2020-01-01", "2020-07-01")
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analitica_cartera import AnaliticaCartera  # noqa: E402
+
+
+def _precios():
+    indice = pd.bdate_range("2020-01-01", "2020-12-31")
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        100 + rng.normal(0, 1, (len(indice), 2)).cumsum(axis=0), index=indice, columns=["A", "B"]
+    )
+
+
+def test_ticker_sin_precios_queda_en_nan():
+    precios = _precios().assign(C=np.nan)
+    analitica = AnaliticaCartera(precios)
+    completa = AnaliticaCartera(precios[["A", "B"]])
+
+    assert analitica.tickers == ["A", "B", "C"]
+    assert analitica.tickers_sin_datos == ["C"]
+    assert len(analitica.precios) == len(precios)
+    # Los tickers con datos no cambian por la columna vacía
+    pd.testing.assert_frame_equal(analitica.precios_normalizados[["A", "B"]], completa.precios_normalizados)
+    pd.testing.assert_series_equal(analitica.rendimiento_anual[["A", "B"]], completa.rendimiento_anual)
+    assert np.isnan(analitica.rendimiento_anual["C"])
+    assert all(np.isnan(analitica.estadisticas([0.5, 0.3, 0.2])))
+    assert analitica.precios_grafica().shape[1] == 3
+
+
+def test_sin_fechas_comunes():
+    precios = _precios()
+    precios.loc[:"2020-06-30", "A"] = np.nan
+    precios.loc["2020-07-01":, "B"] = np.nan
+    analitica = AnaliticaCartera(precios)
+    assert analitica.precios.empty
+    assert analitica.tickers_sin_datos == ["A", "B"]
@@ -0,0 +1,108 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache_compartido  # noqa: E402
+from cache_compartido import CacheMemoria, CacheSQLite, clave_cache  # noqa: E402
+
+TAMANO_VALOR = 40_000  # bytes aleatorios: no se comprimen
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+    def avanzar(self, segundos=1.0):
+        self.ahora += segundos
+
+
+@pytest.fixture(params=["sqlite", "memoria"])
+def crear_cache(request, tmp_path):
+    def crear(limite_mb=1, ttl=60, reloj=None):
+        reloj = reloj or Reloj()
+        if request.param == "sqlite":
+            return CacheSQLite(str(tmp_path / "cache.sqlite"), limite_mb=limite_mb, ttl=ttl, reloj=reloj)
+        return CacheMemoria(limite_mb=limite_mb, ttl=ttl, reloj=reloj)
+    return crear
+
+
+def _valor():
+    return os.urandom(TAMANO_VALOR)
+
+
+def test_expira_con_ttl(crear_cache):
+    reloj = Reloj()
+    cache = crear_cache(reloj=reloj)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2, ttl=120)
+    reloj.avanzar(59)
+    assert cache.obtener("a") == 1
+    reloj.avanzar(1)
+    assert cache.obtener("a") is None
+    assert cache.obtener("b") == 2
+    reloj.avanzar(60)
+    assert cache.obtener("b", "faltante") == "faltante"
+
+
+def test_desaloja_la_menos_usada(crear_cache):
+    reloj = Reloj()
+    # Caben dos valores pero no tres
+    cache = crear_cache(limite_mb=2.5 * TAMANO_VALOR / 2**20, reloj=reloj)
+    cache.guardar("a", _valor())
+    reloj.avanzar()
+    cache.guardar("b", _valor())
+    reloj.avanzar()
+    assert cache.obtener("a") is not None  # "a" pasa a ser la más reciente
+    reloj.avanzar()
+    cache.guardar("c", _valor())
+    assert cache.obtener("b") is None
+    assert cache.obtener("a") is not None
+    assert cache.obtener("c") is not None
+
+
+def test_respeta_el_presupuesto(crear_cache):
+    reloj = Reloj()
+    limite_mb = 4.5 * TAMANO_VALOR / 2**20
+    cache = crear_cache(limite_mb=limite_mb, reloj=reloj)
+    for i in range(10):
+        cache.guardar(f"v{i}", _valor())
+        reloj.avanzar()
+        assert cache.tamano_total() <= limite_mb * 2**20
+    assert len(cache) == 4
+    assert [cache.obtener(f"v{i}") is not None for i in range(10)] == [False] * 6 + [True] * 4
+    # Un valor mayor que todo el presupuesto no se guarda
+    assert not cache.guardar("grande", os.urandom(TAMANO_VALOR * 5))
+    assert len(cache) == 4
+
+
+def test_compartir_falso_no_guarda(crear_cache):
+    cache = crear_cache()
+    llamadas = []
+
+    def calcular():
+        llamadas.append(1)
+        return {"valor": 1}
+
+    assert cache.obtener_o_calcular("k", calcular, compartir=lambda valor: False) == {"valor": 1}
+    assert len(cache) == 0
+    assert cache.obtener_o_calcular("k", calcular) == {"valor": 1}
+    assert cache.obtener_o_calcular("k", calcular) == {"valor": 1}
+    assert len(llamadas) == 2
+
+
+def test_clave_cache_incluye_la_version(monkeypatch):
+    clave = clave_cache("precios", ("SPY", "QQQ"), "2020-01-01", "2021-01-01")
+    assert clave.startswith(f"precios:v{cache_compartido.VERSION_CACHE}:")
+    assert clave == clave_cache("precios", ("SPY", "QQQ"), "2020-01-01", "2021-01-01")
+    assert clave != clave_cache("precios", ("SPY",), "2020-01-01", "2021-01-01")
+
+    monkeypatch.setattr(cache_compartido, "VERSION_CACHE", cache_compartido.VERSION_CACHE + 1)
+    nueva = clave_cache("precios", ("SPY", "QQQ"), "2020-01-01", "2021-01-01")
+    assert nueva != clave
+    assert nueva.startswith(f"precios:v{cache_compartido.VERSION_CACHE}:")
@@ -0,0 +1,65 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cuestionario import (  # noqa: E402
+    COLUMNAS_PREGUNTAS,
+    NUM_PREGUNTAS,
+    clasificar_puntaje,
+    puntuar_respuestas,
+    puntuar_tabla,
+)
+
+
+# Respuestas de un cliente cuyo puntaje total es `total` (entre 67 y 268)
+def _respuestas(total):
+    respuestas = np.ones(NUM_PREGUNTAS, dtype=np.int64)
+    resto = total - NUM_PREGUNTAS
+    respuestas[: resto // 3] = 4
+    if resto % 3:
+        respuestas[resto // 3] += resto % 3
+    return respuestas
+
+
+PERFILES_LIMITE = {
+    67: "Riesgo Alto",
+    68: "Riesgo Medio",
+    267: "Riesgo Medio",
+    268: "Aversión al Riesgo Baja",
+}
+
+
+@pytest.mark.parametrize("total, perfil", PERFILES_LIMITE.items())
+def test_clasificar_puntaje_en_los_limites(total, perfil):
+    assert clasificar_puntaje(total) == perfil
+
+
+def test_puntuar_respuestas_en_los_limites():
+    matriz = np.array([_respuestas(total) for total in PERFILES_LIMITE])
+    totales, perfiles = puntuar_respuestas(matriz)
+    assert list(totales) == list(PERFILES_LIMITE)
+    assert list(perfiles) == list(PERFILES_LIMITE.values())
+
+
+@pytest.mark.parametrize("invalida", [0, 5, np.nan])
+def test_rechaza_respuestas_invalidas(invalida):
+    matriz = np.array([_respuestas(100), _respuestas(200)], dtype=float)
+    matriz[1, 10] = invalida
+    with pytest.raises(ValueError, match="fila 2, pregunta 11"):
+        puntuar_respuestas(matriz)
+
+
+def test_puntuar_tabla_conserva_las_demas_columnas():
+    tabla = pd.DataFrame([_respuestas(67), _respuestas(268)], columns=COLUMNAS_PREGUNTAS)
+    tabla.insert(0, "nombre", ["Ana", "Luis"])
+    tabla["correo"] = ["ana@example.com", "luis@example.com"]
+    resultado = puntuar_tabla(tabla)
+    assert list(resultado.columns) == ["nombre", "correo", "puntaje", "nivel_riesgo"]
+    assert list(resultado["nombre"]) == ["Ana", "Luis"]
+    assert list(resultado["puntaje"]) == [67, 268]
+    assert list(resultado["nivel_riesgo"]) == ["Riesgo Alto", "Aversión al Riesgo Baja"]
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from almacen_precios import AlmacenPrecios, FuenteMemoria  # noqa: E402
+from precarga import Precargador  # noqa: E402
+
+
+def _precios():
+    indice = pd.bdate_range("2020-01-01", "2020-12-31")
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        100 + rng.normal(0, 1, (len(indice), 2)).cumsum(axis=0), index=indice, columns=["A", "B"]
+    )
+
+
+def test_columna_vacia_se_reintenta_y_queda_fallida(tmp_path):
+    fuente = FuenteMemoria(_precios().assign(B=np.nan))
+    almacen = AlmacenPrecios(str(tmp_path), fuente=fuente)
+    precargador = Precargador(almacen, reintentos=3, espera=0.01)
+    precargador.iniciar(["A", "B"], "2020-01-01", "2020-07-01")
+    precargador._futuros["A"].result(timeout=10)
+    precargador.cerrar()
+
+    # El primer intento pide los dos tickers; los reintentos solo el que quedó sin cubrir
+    assert [llamada[0] for llamada in fuente.llamadas] == [("A", "B"), ("B",), ("B",)]
+    assert precargador.pendientes(["A", "B"]) == []
+    assert precargador.fallidos(["A", "B"]) == ["B"]
+    assert almacen.cubre("A", "2020-01-01", "2020-07-01")
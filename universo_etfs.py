@@ -0,0 +1,85 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Universo de ETFs disponible para las recomendaciones.
+# Se carga una sola vez por proceso desde datos/etfs.csv y datos/perfiles.csv y
+# se indexa por ticker, perfil de riesgo, clase de activo y región.
+
+DIRECTORIO_DATOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos")
+RUTA_ETFS = os.path.join(DIRECTORIO_DATOS, "etfs.csv")
+RUTA_PERFILES = os.path.join(DIRECTORIO_DATOS, "perfiles.csv")
+
+
+# Función para construir un índice {valor: posiciones de las filas}
+def _indexar(columna):
+    return {valor: np.flatnonzero(columna.to_numpy() == valor) for valor in columna.unique()}
+
+
+class UniversoETFs:
+    def __init__(self, etfs, perfiles):
+        self.etfs = etfs.reset_index(drop=True)
+        self.por_ticker = {ticker: posicion for posicion, ticker in enumerate(self.etfs["ticker"])}
+        if len(self.por_ticker) != len(self.etfs):
+            raise ValueError("El universo de ETFs tiene tickers repetidos.")
+        self.por_perfil = _indexar(self.etfs["perfil"])
+        self.por_clase = _indexar(self.etfs["clase_activo"])
+        self.por_region = _indexar(self.etfs["region"])
+
+        self.nombres = dict(zip(self.etfs["ticker"], self.etfs["nombre"]))
+        self.explicaciones = dict(zip(perfiles["perfil"], perfiles["explicacion"]))
+
+        # Cartera sugerida por perfil: los ETFs con distribución mayor a cero
+        self.recomendaciones = {}
+        for perfil, posiciones in self.por_perfil.items():
+            sugeridos = self.etfs.iloc[posiciones]
+            sugeridos = sugeridos[sugeridos["distribucion"] > 0]
+            self.recomendaciones[perfil] = {
+                "ETFs": sugeridos["ticker"].tolist(),
+                "Distribución": sugeridos["distribucion"].astype(int).tolist()
+            }
+
+    def __len__(self):
+        return len(self.etfs)
+
+    def __contains__(self, ticker):
+        return ticker in self.por_ticker
+
+    def perfiles(self):
+        return list(self.por_perfil)
+
+    def clases_activo(self):
+        return list(self.por_clase)
+
+    def regiones(self):
+        return list(self.por_region)
+
+    # Datos de un ETF por ticker
+    def etf(self, ticker):
+        return self.etfs.iloc[self.por_ticker[ticker]]
+
+    # ETFs que cumplen todos los filtros indicados (intersección de índices)
+    def filtrar(self, perfil=None, clase_activo=None, region=None):
+        posiciones = None
+        for indice, valor in ((self.por_perfil, perfil), (self.por_clase, clase_activo), (self.por_region, region)):
+            if valor is None:
+                continue
+            encontradas = indice.get(valor, np.empty(0, dtype=np.intp))
+            posiciones = encontradas if posiciones is None else np.intersect1d(posiciones, encontradas, assume_unique=True)
+        if posiciones is None:
+            return self.etfs
+        return self.etfs.iloc[posiciones]
+
+    # Todos los tickers que forman parte de alguna cartera sugerida
+    def tickers_sugeridos(self):
+        return [ticker for recomendacion in self.recomendaciones.values() for ticker in recomendacion["ETFs"]]
+
+
+# Función para cargar el universo (una vez por proceso y por archivo)
+@lru_cache(maxsize=None)
+def cargar_universo(ruta_etfs=RUTA_ETFS, ruta_perfiles=RUTA_PERFILES):
+    etfs = pd.read_csv(ruta_etfs, dtype={"distribucion": float}, keep_default_na=False)
+    perfiles = pd.read_csv(ruta_perfiles, keep_default_na=False)
+    return UniversoETFs(etfs, perfiles)